@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Attachment text extraction for the Gmail Attachment Monitor application.
+
+These are plain functions with no Qt or GmailMonitor references so they can
+run in worker processes: CPU-bound parsing there doesn't hold the GUI
+process's GIL. Log messages are passed to a `log(message, level, exc_info)`
+callable supplied by the caller; logging at "error" level marks the extraction
+as failed, so scan_attachment does not hand its text back for caching.
+"""
+
+import csv
+import io
+import itertools
+import os
+import shutil
+import subprocess
+import traceback
+# Attachment parsers (fitz, pypdf, docx, openpyxl, zipfile) are imported inside
+# iter_attachment_chunks so a worker only loads the libraries it actually needs
+
+# Rows parsed per block when searching CSV attachments
+CSV_CHUNK_ROWS = 10_000
+# Rows per block when searching XLSX attachments
+XLSX_CHUNK_ROWS = 10_000
+# Member names per block when searching ZIP listings
+ZIP_CHUNK_NAMES = 1_000
+# poppler's pdftotext, if installed; used for PDFs PyMuPDF cannot handle
+PDFTOTEXT = shutil.which('pdftotext')
+PDFTOTEXT_TIMEOUT = 30 # seconds
+
+
+def scan_attachment(attachment_data, mime_type: str, filename: str, search_re):
+    """
+    Worker process entry point: extracts the text of one attachment and checks
+    it against the compiled `search_re`. attachment_data is either the bytes or
+    the path of a temp file holding them (large attachments are spooled to disk
+    rather than pickled to the worker).
+
+    Returns (hit, text, log_messages). Extraction stops at the first hit, in which
+    case text is None; otherwise text is the full extracted text, for caching, or
+    None if extraction failed (a later check should try again).
+    log_messages is a list of (message, level) tuples for the caller to log.
+    """
+    log_messages = []
+    failed = False
+
+    def log(message, level="info", exc_info=False):
+        nonlocal failed
+        if level == "error":
+            failed = True
+        if exc_info:
+            message = f"{message}\n{traceback.format_exc()}"
+        log_messages.append((message, level))
+
+    chunks = []
+    chunk_iter = iter_attachment_chunks(attachment_data, mime_type, filename, log)
+    try:
+        for chunk in chunk_iter:
+            if search_re.search(chunk):
+                return True, None, log_messages
+            chunks.append(chunk)
+    finally:
+        chunk_iter.close() # Release open documents right away on an early hit
+    return False, None if failed else "\n".join(chunks), log_messages
+
+
+def extract_text_from_attachment(attachment_data, mime_type, filename, log):
+    """Extract the full text from various attachment types."""
+    return "\n".join(iter_attachment_chunks(attachment_data, mime_type, filename, log))
+
+
+def iter_attachment_chunks(attachment_data, mime_type, filename, log):
+    """
+    Yield the text of an attachment piece by piece: per page for PDF, per
+    paragraph for DOCX, per row for XLSX and as a single chunk otherwise.
+
+    Callers searching for a keyword can stop at the first hit instead of
+    extracting the whole document.
+    """
+    extractor = _find_extractor(mime_type, filename)
+    if extractor is None:
+        # Only log if it's not a common non-text type we expect to ignore
+        common_ignored = ['image/', 'application/octet-stream'] # Add more if needed
+        if not any(mime_type.startswith(prefix) for prefix in common_ignored):
+             log(f"Skipping unsupported attachment type: {filename} ({mime_type})", "info")
+        yield f"[Unsupported attachment type: {mime_type}]"
+        return
+
+    try:
+        yield from extractor(attachment_data, filename, log)
+    except Exception as e:
+        log(f"Critical error extracting text from {filename} ({mime_type}): {str(e)}", "error", exc_info=True) # Add stack trace
+        yield "[Error during text extraction]"
+
+
+def is_text_extractable(mime_type: str, filename: str) -> bool:
+    """
+    Returns True if an attachment can be searched for text, judged by its MIME
+    type or, for generic types such as application/octet-stream, its extension.
+    """
+    return _find_extractor(mime_type, filename) is not None
+
+
+def _find_extractor(mime_type, filename):
+    """Look up the extractor for an attachment: by MIME type first, then by extension."""
+    extractor = _EXTRACTORS.get((mime_type or '').split(';', 1)[0].strip().lower())
+    if extractor is None:
+        extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+        extractor = _EXTRACTORS_BY_EXTENSION.get(extension)
+    return extractor
+
+
+def _as_file(attachment_data):
+    """
+    Returns what parsers taking a path or file object should open: the path of
+    a spooled attachment as is, or a BytesIO over in-memory bytes.
+
+    A BytesIO shares the buffer of the bytes object it is created from until it
+    is written to, so this does not copy the attachment (a pooled, refilled
+    buffer would). Other buffer types (bytearray, memoryview) are converted once.
+    """
+    if isinstance(attachment_data, str):
+        return attachment_data
+    if not isinstance(attachment_data, bytes):
+        attachment_data = bytes(attachment_data)
+    return io.BytesIO(attachment_data)
+
+
+def _as_bytes(attachment_data):
+    """Returns the attachment bytes, reading them in if the attachment was spooled to a file."""
+    if isinstance(attachment_data, str):
+        with open(attachment_data, 'rb') as f:
+            return f.read()
+    return attachment_data
+
+
+def _iter_txt(attachment_data, filename, log):
+    """Plain text, as a single chunk."""
+    attachment_data = _as_bytes(attachment_data)
+    # Try common encodings
+    for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
+        try:
+            text = attachment_data.decode(encoding)
+            break
+        except UnicodeDecodeError:
+            continue
+    else:
+         log(f"Could not decode text file: {filename} with common encodings.", "warning")
+         text = "[Could not decode text]"
+    yield text
+
+
+def _iter_pdf(attachment_data, filename, log):
+    """PDF text, one page at a time."""
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+
+    doc = None
+    if fitz is not None:
+        try:
+            # PyMuPDF reads straight from the bytes or the spooled file; no BytesIO wrapper needed
+            if isinstance(attachment_data, str):
+                doc = fitz.open(attachment_data, filetype='pdf')
+            else:
+                doc = fitz.open(stream=attachment_data, filetype='pdf')
+        except Exception as fitz_err:
+            log(f"PyMuPDF could not read PDF '{filename}' ({fitz_err}), trying fallbacks", "warning")
+
+    if doc is None:
+        # poppler's pdftotext is native code and tolerant of odd files; pypdf is the last resort
+        text = _run_pdftotext(attachment_data, filename, log) if PDFTOTEXT else None
+        if text is None:
+            yield from _iter_pdf_pages_pypdf(attachment_data, filename, log)
+            return
+        found_text = False
+        for page_text in text.split('\f'): # pdftotext ends every page with a form feed
+            if page_text.strip():
+                found_text = True
+                yield page_text
+        if not found_text:
+            log(f"Could not extract text from PDF: {filename} (possibly image-based)", "warning")
+            yield "[Could not extract text from PDF - Image Based?]"
+        return
+
+    with doc:
+        if doc.needs_pass:
+             log(f"Skipping encrypted PDF: {filename}", "warning")
+             yield "[Encrypted PDF - Cannot Extract Text]"
+        else:
+             found_text = False
+             # Pages stay sequential: MuPDF is not thread-safe, attachments already run in
+             # parallel across worker processes, and in order the scan can stop at the first hit
+             for page in doc:
+                  try:
+                       page_text = page.get_text('text')
+                  except Exception as page_err:
+                       log(f"Error extracting text from page in PDF '{filename}': {page_err}", "warning")
+                       continue # Try next page
+                  if page_text.strip():
+                       found_text = True
+                       yield page_text
+             if not found_text and doc.page_count > 0:
+                  log(f"Could not extract text from PDF: {filename} (possibly image-based)", "warning")
+                  yield "[Could not extract text from PDF - Image Based?]"
+
+
+def _run_pdftotext(attachment_data, filename, log):
+    """Return the text pdftotext extracts from the PDF, or None if it fails or times out."""
+    try:
+        # "-" pipes in-memory PDFs through stdin (no temp file needed) and the text back through stdout
+        if isinstance(attachment_data, str):
+            source, stdin_data = attachment_data, None
+        else:
+            source, stdin_data = '-', attachment_data
+        result = subprocess.run([PDFTOTEXT, '-q', '-enc', 'UTF-8', source, '-'], input=stdin_data,
+                                capture_output=True, timeout=PDFTOTEXT_TIMEOUT,
+                                creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)) # No console flash on Windows
+    except (OSError, subprocess.TimeoutExpired) as pdftotext_err:
+        # Not the file's fault (busy machine, broken install), so the result must not be cached
+        log(f"pdftotext failed on PDF '{filename}': {pdftotext_err}", "error")
+        return None
+    if result.returncode != 0:
+        log(f"pdftotext could not read PDF '{filename}' (exit code {result.returncode})", "warning")
+        return None
+    return result.stdout.decode('utf-8', errors='replace')
+
+
+def _iter_docx(attachment_data, filename, log):
+    """DOCX text, one paragraph at a time."""
+    import docx
+    try:
+        doc = docx.Document(_as_file(attachment_data))
+    except Exception as docx_err:
+         log(f"Error reading DOCX file '{filename}': {docx_err}", "warning")
+         yield "[Error reading DOCX file]"
+    else:
+         for para in doc.paragraphs:
+              yield para.text
+
+
+def _iter_csv(attachment_data, filename, log):
+    """CSV text, one block of CSV_CHUNK_ROWS rows at a time."""
+    decoded_text = ""
+    try:
+        attachment_data = _as_bytes(attachment_data)
+        # Try decoding first
+        for encoding in ['utf-8', 'latin-1', 'cp1252']:
+             try:
+                  decoded_text = attachment_data.decode(encoding)
+                  break
+             except UnicodeDecodeError:
+                  continue
+        else:
+             raise ValueError("Could not decode CSV with common encodings")
+
+        # The csv module's C reader is all that's needed to flatten rows into searchable
+        # text; a DataFrame would only add parsing and formatting overhead
+        rows = csv.reader(io.StringIO(decoded_text))
+        while True:
+             block = list(itertools.islice(rows, CSV_CHUNK_ROWS))
+             if not block:
+                  break
+             yield "\n".join("\t".join(row) for row in block)
+    except Exception as csv_err:
+         log(f"Error reading CSV file '{filename}': {csv_err}", "warning")
+         text = "[Error reading CSV file]"
+         if decoded_text: # If decode worked but parsing failed, provide raw text
+              text += "\n[Raw Decoded Content:\n" + decoded_text[:1000] + "...]" # Limit raw preview
+         yield text
+
+
+def _iter_xlsx(attachment_data, filename, log):
+    """XLSX text, one block of XLSX_CHUNK_ROWS rows at a time, each sheet starting with a header line."""
+    import openpyxl
+    try:
+        # read_only streams rows in constant memory and skips style parsing
+        wb = openpyxl.load_workbook(_as_file(attachment_data), read_only=True, data_only=True)
+    except Exception as xlsx_err:
+        log(f"Error reading XLSX file '{filename}': {xlsx_err}", "warning")
+        yield "[Error reading XLSX file]"
+    else:
+        try:
+             for ws in wb.worksheets:
+                  # Rows are written straight into a buffer and handed out in blocks, so the
+                  # search runs once per block instead of once per row
+                  buf = io.StringIO()
+                  buf.write(f"--- Sheet: {ws.title} ---\n")
+                  rows_in_buf = 0
+                  try:
+                      for row in ws.iter_rows(values_only=True):
+                           buf.write("\t".join("" if value is None else str(value) for value in row))
+                           buf.write("\n")
+                           rows_in_buf += 1
+                           if rows_in_buf >= XLSX_CHUNK_ROWS:
+                                yield buf.getvalue()
+                                buf = io.StringIO()
+                                rows_in_buf = 0
+                  except Exception as sheet_err:
+                      log(f"Error reading sheet '{ws.title}' in XLSX '{filename}': {sheet_err}", "warning")
+                      buf.write("[Error reading sheet]\n")
+                  if buf.tell():
+                      yield buf.getvalue()
+        finally:
+             wb.close()
+
+
+def _iter_zip(attachment_data, filename, log):
+    """ZIP member names, ZIP_CHUNK_NAMES at a time."""
+    import zipfile
+    try:
+        with zipfile.ZipFile(_as_file(attachment_data), 'r') as zf:
+            names = zf.namelist() # Read from the central directory parsed on open
+    except zipfile.BadZipFile:
+         log(f"Could not read ZIP file (corrupted?): {filename}", "warning")
+         yield "[Invalid ZIP file]"
+         return
+    except Exception as zip_err:
+         log(f"Error reading ZIP file '{filename}': {zip_err}", "warning")
+         yield "[Error reading ZIP file]"
+         return
+    # Future: Add extraction and recursive search of members here if needed
+    yield f"--- ZIP Contents ({filename}): {len(names)} entries ---"
+    # Blocks rather than one big string, so a match in the first names skips formatting the rest
+    for start in range(0, len(names), ZIP_CHUNK_NAMES):
+         yield "\n".join(names[start:start + ZIP_CHUNK_NAMES])
+
+
+def _iter_pdf_pages_pypdf(attachment_data, filename, log):
+    """Fallback PDF text extraction using the pure-Python pypdf reader, one page at a time."""
+    import pypdf
+    try:
+        with io.BytesIO(_as_bytes(attachment_data)) as f: # pypdf reads a whole file into memory anyway
+            reader = pypdf.PdfReader(f, strict=False)
+            if reader.is_encrypted:
+                 log(f"Skipping encrypted PDF: {filename}", "warning")
+                 yield "[Encrypted PDF - Cannot Extract Text]"
+                 return
+            found_text = False
+            for page in reader.pages:
+                 try:
+                      page_text = page.extract_text()
+                 except Exception as page_err:
+                      log(f"Error extracting text from page in PDF '{filename}': {page_err}", "warning")
+                      continue # Try next page
+                 if page_text:
+                      found_text = True
+                      yield page_text
+            if not found_text and len(reader.pages) > 0:
+                 log(f"Could not extract text from PDF: {filename} (possibly image-based)", "warning")
+                 yield "[Could not extract text from PDF - Image Based?]"
+    except pypdf.errors.PdfReadError as pdf_err:
+         log(f"Error reading PDF file '{filename}': {pdf_err}", "warning")
+         yield "[Invalid or Corrupted PDF]"
+    except Exception as pdf_gen_err:
+        log(f"General error processing PDF '{filename}': {pdf_gen_err}", "error")
+        yield "[Error Processing PDF]"
+
+
+# MIME type / extension -> extractor. Built once, so dispatch is a dict lookup and
+# supporting a new format is one more entry here.
+_EXTRACTORS = {
+    'text/plain': _iter_txt,
+    'text/csv': _iter_csv,
+    'application/pdf': _iter_pdf,
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': _iter_docx,
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': _iter_xlsx,
+    'application/zip': _iter_zip,
+    'application/x-zip-compressed': _iter_zip,
+}
+_EXTRACTORS_BY_EXTENSION = {
+    'txt': _iter_txt,
+    'csv': _iter_csv,
+    'pdf': _iter_pdf,
+    'docx': _iter_docx,
+    'xlsx': _iter_xlsx,
+    'zip': _iter_zip,
+}
@@ -1,43 +1,45 @@
 # -*- coding: utf-8 -*-
 # Keep the existing imports, adjust paths for moved components
 import os
+import json
 import time
 import base64
 import datetime
-import threading
-import sys
-import pickle
-import io
-import re
-import PyPDF2
-import docx
-import pandas as pd
-import zipfile
-import datetime
-import traceback 
-from .utils import escape_html 
-
-from bs4 import BeautifulSoup
+import collections
+import concurrent.futures
+import tempfile
+import multiprocessing
+import traceback
+
+import httplib2
+import google_auth_httplib2
 from googleapiclient.discovery import build
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
-from plyer import notification # Keep plyer import here if send_notification stays here
+from googleapiclient.errors import HttpError
+# google_auth_oauthlib (OAuth consent flow) and google.auth.transport.requests (token
+# refresh, pulls in requests) are imported where used; a valid saved token needs neither
+from google.oauth2.credentials import Credentials
+# plyer is imported in send_notification; it is only needed once something matches
 
 from PyQt6.QtWidgets import (QMainWindow, QTabWidget, QWidget, QVBoxLayout,
-                             QHBoxLayout, QLabel, QTextEdit, QTreeWidget,
-                             QTreeWidgetItem, QGroupBox, QSplitter, QMessageBox,
-                             QHeaderView, QFormLayout, QFrame, QStatusBar) # Removed QApplication, QSplashScreen, QProgressBar, QPushButton etc. - they are in widgets or main
-from PyQt6.QtCore import Qt, pyqtSignal, QTimer # Keep QThread related if threads stay as inner classes, otherwise remove
-from PyQt6.QtGui import QFont, QColor, QIcon, QPixmap # Keep QFont, QColor etc.
+                             QHBoxLayout, QLabel, QAbstractItemView,
+                             QSplitter, QMessageBox,
+                             QHeaderView, QFormLayout, QFrame, QStatusBar, QApplication) # Removed QSplashScreen, QProgressBar, QPushButton etc. - they are in widgets or main
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal # Keep QThread related if threads stay as inner classes, otherwise remove
+from PyQt6.QtGui import QFont, QTextCursor
 
 # Import components from other files in the package
 from .theme import ThemeManager
 from .widgets import (StyledProgressBar, PulseProgressBar, StyledButton, StyledGroupBox,
-                      StyledTreeWidget, StyledTextEdit, StyledLineEdit, StyledSpinBox,
-                      StyledComboBox, DashboardWidget) # Import necessary widgets
-from .threads import EmailCheckerThread, ManualCheckThread # Import threads
-from .utils import (get_email_body, format_sender, escape_html,
-                    format_body_text_no_highlight, get_attachments_info) # Import utils
+                      StyledTreeView, StyledTextEdit, StyledLineEdit, StyledSpinBox,
+                      StyledCheckBox, StyledComboBox, build_global_qss) # Import necessary widgets
+from .threads import EmailCheckerThread, ManualCheckThread, GmailConnectThread # Import threads
+from .storage import AttachmentTextCache, EmailDetailStore, ProcessedIdStore
+from .models import MatchedEmailsModel, MatchedEmailsProxyModel
+from .extractors import scan_attachment, is_text_extractable
+from .utils import (get_email_body, escape_html,
+                    format_body_text_no_highlight, get_attachments_info,
+                    gmail_parts_fields, get_headers,
+                    split_search_terms, compile_search_pattern) # Import utils
 
 # --- GmailMonitor Class ---
 # (Copy the ENTIRE GmailMonitor class here)
@@ -52,6 +54,44 @@ from .utils import (get_email_body, format_sender, escape_html,
 #   (Keeping them here is simpler for accessing 'self.service' and 'self.log')
 
 class GmailMonitor(QMainWindow):
+    first_shown = pyqtSignal() # Emitted once, on the window's first showEvent
+
+    # Gmail accepts at most 100 calls in a single batch request
+    BATCH_SIZE = 100
+    # Stage 1 projection: headers + attachment descriptors, no inline body data
+    METADATA_FIELDS = f'id,internalDate,payload(headers,{gmail_parts_fields()})'
+    # Stage 2 projection: everything needed to render the body of a matched email
+    MESSAGE_FIELDS = 'id,payload/headers,payload/parts,payload/body,internalDate'
+    # Worker processes for attachment text extraction (CPU-bound, so one per core)
+    EXTRACT_WORKERS = os.cpu_count() or 4
+    # Extra attempts for batched calls rejected by the per-user rate limit
+    BATCH_RETRIES = 3
+    # Larger attachments reach extraction workers as temp files instead of through the pool's pipe
+    SPOOL_ATTACHMENT_BYTES = 1024 * 1024
+    # Cap on the combined size of attachments downloaded in one batch request
+    ATTACHMENT_BATCH_BYTES = 50 * 1024 * 1024
+    # On-disk cache of extracted attachment text (next to token.json)
+    ATT_CACHE_PATH = '.att_cache.db'
+    # Message ids already checked, persisted across runs
+    STATE_DB_PATH = '.monitor_state.db'
+    # OAuth client secrets (from Google Cloud Console) and the saved user token
+    CREDENTIALS_PATH = 'credentials.json'
+    TOKEN_PATH = 'token.json'
+    # Bodies and attachment lists of matched emails, kept on disk for the current run
+    DETAILS_DB_PATH = '.email_details.db'
+    # Scheduled checks back off while nothing new matches: at most 2**4 times the interval, max 1 hour
+    MAX_BACKOFF_DOUBLINGS = 4
+    MAX_CHECK_INTERVAL = 3600
+    # Messages in these labels are ignored, as messages.list does by default
+    SKIPPED_LABELS = frozenset({'SPAM', 'TRASH', 'DRAFT'})
+    # How often queued log entries are flushed to the log pane
+    LOG_FLUSH_MS = 100
+    LOG_MAX_BLOCKS = 5000 # Oldest log entries are dropped beyond this many blocks (one per entry, plus traceback lines)
+    BODY_PREVIEW_CHARS = 100_000 # Longest body text shown in the details pane
+    DETAILS_CACHE_SIZE = 16 # Rendered details of recently shown emails, by id
+    # Severity of each log level; entries below the selected level are dropped before any formatting
+    LOG_LEVELS = {"debug": 10, "info": 20, "success": 20, "warning": 30, "error": 40}
+
     def __init__(self):
         super().__init__()
 
@@ -59,19 +99,38 @@ class GmailMonitor(QMainWindow):
         self.SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
         self.creds = None
         self.service = None
+        self._connect_thread = None # Loads saved credentials at startup (see connect_to_gmail)
+        self._first_shown = False
 
         # Application state (keep as is)
         self.running = False
         self.search_term = "varun" # Default keyword
         self.days_to_search = 1
         self.check_interval = 300  # 5 minutes
+        self._empty_streak = 0 # Consecutive checks without new matches, drives the interval backoff
+        self.max_attachment_bytes = 10 * 1024 * 1024 # Larger attachments are not downloaded
+        self.search_contents = True # False: match attachment file names only, never download
         self.monitor_thread = None
         self.manual_thread = None # Add reference for manual thread
+        # Attachment text extraction runs in worker processes so parsing never holds the GUI's GIL;
+        # downloads stay on the checking thread
+        self._extract_pool = self._create_extract_pool()
+        # Extracted attachment text survives restarts, so re-checks skip download + parsing
+        self._att_cache = AttachmentTextCache(self.ATT_CACHE_PATH)
+        self._search_re = None # Compiled keyword matcher, rebuilt at the start of each check
+        # Formatted log entries waiting to be written to the log pane (deque append/popleft are thread-safe)
+        self._log_queue = collections.deque()
+        self._log_level_num = self.LOG_LEVELS["info"] # Minimum severity shown; set from the Log Level setting
         self.theme = ThemeManager.THEMES["Light"] # Default theme
+        self._build_log_templates()
 
         # Store matched emails (keep as is)
         self.matched_emails = []
-        self.processed_ids = set()
+        self._matched_ids = set() # Mirrors the ids in matched_emails for O(1) lookups
+        self._detail_store = EmailDetailStore(self.DETAILS_DB_PATH) # Bodies/attachment lists of matched_emails live on disk
+        self._details_html = {} # msg_id -> details pane HTML, oldest first; reset on theme change and Clear All
+        self._processed_store = ProcessedIdStore(self.STATE_DB_PATH)
+        self.processed_ids = self._processed_store.load()
 
         # UI Initialization is done via methods
         self.init_ui()
@@ -84,8 +143,11 @@ class GmailMonitor(QMainWindow):
         self.setWindowTitle("Gmail Attachment Monitor")
         self.setGeometry(100, 100, 1200, 800) # Adjusted default size
 
-        app_font = QFont("Segoe UI", 10)
-        self.setFont(app_font)
+        # Built once and shared; child widgets inherit the window font, so labels only
+        # need setFont when they differ from it
+        self._font_body = QFont("Segoe UI", 10)
+        self._font_title = QFont("Segoe UI", 18, QFont.Weight.Bold)
+        self.setFont(self._font_body)
 
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -96,7 +158,7 @@ class GmailMonitor(QMainWindow):
         # --- Header ---
         header_layout = QHBoxLayout()
         logo_label = QLabel("Gmail Attachment Monitor")
-        logo_label.setFont(QFont("Segoe UI", 18, QFont.Weight.Bold))
+        logo_label.setFont(self._font_title)
         header_layout.addWidget(logo_label)
         header_layout.addStretch()
         theme_label = QLabel("Theme:")
@@ -110,6 +172,7 @@ class GmailMonitor(QMainWindow):
 
         # --- Tab Widget ---
         self.tab_widget = QTabWidget()
+        self.tab_widget.setObjectName("mainTabs")
         main_layout.addWidget(self.tab_widget)
 
         # Create tabs (add Dashboard tab potentially)
@@ -137,11 +200,17 @@ class GmailMonitor(QMainWindow):
         # Apply initial theme
         self.change_theme("Light")
 
+        # Flush queued log entries to the log pane ~10 times a second instead of on every call
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(self.LOG_FLUSH_MS)
+        self._log_timer.timeout.connect(self._drain_log)
+        self._log_timer.start()
+
     # --- setup_dashboard_tab (Optional) ---
     # def setup_dashboard_tab(self):
     #    layout = QVBoxLayout(self.dashboard_tab)
-    #    # Pass the theme dict to DashboardWidget constructor
-    #    self.dashboard_widget = DashboardWidget(self.theme)
+    #    # Styled by the application stylesheet (build_global_qss)
+    #    self.dashboard_widget = DashboardWidget()
     #    layout.addWidget(self.dashboard_widget)
 
     def setup_monitoring_tab(self):
@@ -161,24 +230,40 @@ class GmailMonitor(QMainWindow):
         form_layout.setSpacing(10) # Reduced spacing slightly
 
         search_label = QLabel("Username/Keyword in Attachments:")
-        search_label.setFont(QFont("Segoe UI", 10))
         self.search_term_input = StyledLineEdit(self.search_term)
+        self.search_term_input.setToolTip("Separate multiple keywords with commas; an attachment matches if it contains any of them.")
         form_layout.addRow(search_label, self.search_term_input)
 
         days_label = QLabel("Search emails from last (days):")
-        days_label.setFont(QFont("Segoe UI", 10))
         self.days_spinner = StyledSpinBox()
         self.days_spinner.setValue(self.days_to_search)
         self.days_spinner.setRange(1, 30)
         form_layout.addRow(days_label, self.days_spinner)
 
         interval_label = QLabel("Check Interval (seconds):")
-        interval_label.setFont(QFont("Segoe UI", 10))
         self.interval_spinner = StyledSpinBox()
         self.interval_spinner.setValue(self.check_interval)
         self.interval_spinner.setRange(60, 3600) # Min 1 min, Max 1 hour
         self.interval_spinner.setSingleStep(60) # Step by minute
         form_layout.addRow(interval_label, self.interval_spinner)
+
+        max_size_label = QLabel("Max Attachment Size (MB):")
+        self.max_size_spinner = StyledSpinBox()
+        self.max_size_spinner.setRange(1, 100) # Gmail attachments are capped at 25 MB, but forwarded ones can be larger
+        self.max_size_spinner.setValue(self.max_attachment_bytes // (1024 * 1024))
+        form_layout.addRow(max_size_label, self.max_size_spinner)
+
+        contents_label = QLabel("Attachment Contents:")
+        self.search_contents_check = StyledCheckBox("Search inside attachments (file names are always checked)")
+        self.search_contents_check.setChecked(self.search_contents)
+        form_layout.addRow(contents_label, self.search_contents_check)
+
+        log_level_label = QLabel("Log Level:")
+        self.log_level_combo = StyledComboBox()
+        self.log_level_combo.addItems(["Debug", "Info", "Warning", "Error"])
+        self.log_level_combo.setCurrentText("Info")
+        self.log_level_combo.currentTextChanged.connect(self.set_log_level) # Applies immediately, even while monitoring
+        form_layout.addRow(log_level_label, self.log_level_combo)
         settings_layout.addLayout(form_layout)
 
         button_layout = QHBoxLayout()
@@ -200,7 +285,6 @@ class GmailMonitor(QMainWindow):
         status_group = StyledGroupBox("Monitoring Status")
         status_layout = QVBoxLayout()
         self.status_text = QLabel("Not monitoring")
-        self.status_text.setFont(QFont("Segoe UI", 10))
         self.status_text.setWordWrap(True) # Allow wrapping
         status_layout.addWidget(self.status_text)
         self.monitor_progress = StyledProgressBar() # Progress for manual check
@@ -212,6 +296,7 @@ class GmailMonitor(QMainWindow):
         log_layout = QVBoxLayout()
         self.log_text = StyledTextEdit() # Read-only by default
         self.log_text.setReadOnly(True)
+        self.log_text.document().setMaximumBlockCount(self.LOG_MAX_BLOCKS) # Don't grow without bound in long sessions
         log_layout.addWidget(self.log_text)
         log_group.setLayout(log_layout)
         layout.addWidget(log_group, stretch=1) # Allow log to stretch
@@ -220,21 +305,20 @@ class GmailMonitor(QMainWindow):
     def setup_summaries_tab(self):
         """Set up the summaries tab UI"""
         # ... (Keep implementation, ensure Styled* widgets are used) ...
-        # Example: self.email_tree = StyledTreeWidget()
+        # Example: self.email_tree = StyledTreeView()
         layout = QVBoxLayout(self.summaries_tab)
         layout.setContentsMargins(15, 15, 15, 15)
         layout.setSpacing(15)
 
         # --- Top controls ---
         top_layout = QHBoxLayout()
-        stats_frame = QFrame() # Use standard QFrame, style applied in change_theme
+        stats_frame = QFrame() # Use standard QFrame, styled by the application stylesheet
+        stats_frame.setObjectName("statsFrame")
         stats_layout = QHBoxLayout(stats_frame)
         self.total_emails_label = QLabel("Total Emails: 0")
-        self.total_emails_label.setFont(QFont("Segoe UI", 10))
         stats_layout.addWidget(self.total_emails_label)
         stats_layout.addWidget(QLabel("|"))
         self.last_check_label = QLabel("Last Check: Never")
-        self.last_check_label.setFont(QFont("Segoe UI", 10))
         stats_layout.addWidget(self.last_check_label)
         top_layout.addWidget(stats_frame)
         top_layout.addStretch()
@@ -251,7 +335,6 @@ class GmailMonitor(QMainWindow):
         # --- Filter ---
         filter_layout = QHBoxLayout()
         filter_label = QLabel("Filter:")
-        filter_label.setFont(QFont("Segoe UI", 10))
         filter_layout.addWidget(filter_label)
         self.filter_input = StyledLineEdit()
         self.filter_input.setPlaceholderText("Filter by sender, subject, or matched file...") # Placeholder text
@@ -267,10 +350,14 @@ class GmailMonitor(QMainWindow):
         # --- Email list group ---
         email_list_group = StyledGroupBox("Email List (Matches in Attachments)")
         email_list_layout = QVBoxLayout()
-        self.email_tree = StyledTreeWidget()
-        self.email_tree.setHeaderLabels(["Timestamp", "Sender", "Subject", "Matched Attachment(s)"])
-        self.email_tree.setSelectionMode(QTreeWidget.SelectionMode.SingleSelection)
-        self.email_tree.itemClicked.connect(self.show_email_details)
+        # The view reads matched_emails through a model; the proxy sorts and filters it
+        self.email_model = MatchedEmailsModel(self)
+        self.email_proxy = MatchedEmailsProxyModel(self)
+        self.email_proxy.setSourceModel(self.email_model)
+        self.email_tree = StyledTreeView()
+        self.email_tree.setModel(self.email_proxy)
+        self.email_tree.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.email_tree.clicked.connect(self.show_email_details)
         header = self.email_tree.header()
         header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents) # Timestamp, Sender, Matched Files
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch) # Subject stretches
@@ -296,52 +383,81 @@ class GmailMonitor(QMainWindow):
     # --- connect_to_gmail ---
     def connect_to_gmail(self):
         """Connect to Gmail API"""
-        # ... (Keep full implementation) ...
-        # Ensure 'credentials.json' and 'token.pickle' paths are correct (should be root)
-        creds_path = 'credentials.json'
-        token_path = 'token.pickle'
+        # Reading token.json and refreshing an expired token is network I/O, so it runs on a
+        # worker thread and the window stays responsive; _finish_connect picks up on this thread
+        self.start_button.setEnabled(False)
+        self.check_button.setEnabled(False)
+        self.status_label.setText("Connecting...")
+        self._connect_thread = GmailConnectThread(self)
+        self._connect_thread.connected_signal.connect(self._finish_connect)
+        self._connect_thread.start()
+
+    # --- load_saved_credentials ---
+    def load_saved_credentials(self):
+        """Return valid credentials from token.json, refreshed if expired, or None. Runs on GmailConnectThread."""
+        # Ensure 'credentials.json' and 'token.json' paths are correct (should be root)
+        creds = None
+        if os.path.exists(self.TOKEN_PATH):
+            try:
+                creds = Credentials.from_authorized_user_file(self.TOKEN_PATH, self.SCOPES)
+            except ValueError as token_err:
+                self.log(f"Ignoring unreadable token file {self.TOKEN_PATH}: {token_err}. Please re-authenticate.", "warning")
+                return None
+
+        if creds and not creds.valid:
+            if creds.expired and creds.refresh_token:
+                try:
+                    from google.auth.transport.requests import Request
+                    creds.refresh(Request())
+                except Exception as refresh_err:
+                     self.log(f"Error refreshing token: {refresh_err}. Please re-authenticate.", "error")
+                     # Force re-authentication by deleting token file
+                     if os.path.exists(self.TOKEN_PATH):
+                         os.remove(self.TOKEN_PATH)
+                     return None
+                self._save_token(creds)
+            else: # Creds without refresh token
+                return None
+        return creds
+
+    # --- _save_token ---
+    def _save_token(self, creds):
+        """Save the credentials for the next run"""
+        # Write a temp file and swap it in so a crash mid-write never leaves a truncated token behind
+        try:
+            tmp_path = self.TOKEN_PATH + '.tmp'
+            with open(tmp_path, 'w') as token:
+                token.write(creds.to_json())
+            os.replace(tmp_path, self.TOKEN_PATH)
+        except Exception as dump_err:
+            self.log(f"Warning: Could not save token to {self.TOKEN_PATH}: {dump_err}", "warning")
+
+    # --- _finish_connect ---
+    def _finish_connect(self, creds):
+        """Complete the connection with the credentials loaded by GmailConnectThread (None: run the OAuth flow)"""
+        creds_path = self.CREDENTIALS_PATH
+        self.creds = creds
         try:
-            if os.path.exists(token_path):
-                with open(token_path, 'rb') as token:
-                    self.creds = pickle.load(token)
-
-            if not self.creds or not self.creds.valid:
-                if self.creds and self.creds.expired and self.creds.refresh_token:
-                    try:
-                        self.creds.refresh(Request())
-                    except Exception as refresh_err:
-                         self.log(f"Error refreshing token: {refresh_err}. Please re-authenticate.", "error")
-                         # Force re-authentication by deleting token file
-                         if os.path.exists(token_path):
-                             os.remove(token_path)
-                         self.creds = None # Reset creds
-                         # Re-run the flow below
-                # else: # Covers no creds, or creds without refresh token
-                if not self.creds: # Re-check after potential refresh failure/deletion
-                    if not os.path.exists(creds_path):
-                        self.log(f"Error: {creds_path} not found. Please download it from Google Cloud Console and place it in the application's root directory.", "error")
-                        QMessageBox.critical(self, "Credentials Error", f"{creds_path} not found. See README for setup instructions.")
-                        # Disable buttons or exit? For now, just log and show message.
-                        self.start_button.setEnabled(False)
-                        self.check_button.setEnabled(False)
-                        return # Stop connection attempt
-
-                    flow = InstalledAppFlow.from_client_secrets_file(creds_path, self.SCOPES)
-                    # Make run_local_server slightly more robust
-                    try:
-                         self.creds = flow.run_local_server(port=0, prompt='consent', authorization_prompt_message='Please authorize access to Gmail Read-Only:\n')
-                    except Exception as flow_err:
-                         self.log(f"Error during OAuth flow: {flow_err}", "error")
-                         QMessageBox.critical(self, "Authentication Error", f"Failed to complete authentication: {flow_err}")
-                         return
-
-                # Save the credentials for the next run
+            if not self.creds: # No usable saved token
+                if not os.path.exists(creds_path):
+                    self.log(f"Error: {creds_path} not found. Please download it from Google Cloud Console and place it in the application's root directory.", "error")
+                    QMessageBox.critical(self, "Credentials Error", f"{creds_path} not found. See README for setup instructions.")
+                    # Disable buttons or exit? For now, just log and show message.
+                    self.status_label.setText("Not Connected")
+                    return # Stop connection attempt
+
+                from google_auth_oauthlib.flow import InstalledAppFlow
+                flow = InstalledAppFlow.from_client_secrets_file(creds_path, self.SCOPES)
+                # Make run_local_server slightly more robust
                 try:
-                    with open(token_path, 'wb') as token:
-                        pickle.dump(self.creds, token)
-                except Exception as dump_err:
-                    self.log(f"Warning: Could not save token to {token_path}: {dump_err}", "warning")
+                     self.creds = flow.run_local_server(port=0, prompt='consent', authorization_prompt_message='Please authorize access to Gmail Read-Only:\n')
+                except Exception as flow_err:
+                     self.log(f"Error during OAuth flow: {flow_err}", "error")
+                     QMessageBox.critical(self, "Authentication Error", f"Failed to complete authentication: {flow_err}")
+                     self.status_label.setText("Not Connected")
+                     return
 
+                self._save_token(self.creds)
 
             # Build the service object if creds are valid
             if self.creds and self.creds.valid:
@@ -351,19 +467,18 @@ class GmailMonitor(QMainWindow):
                  if not self.running: # Only enable if not already monitoring
                      self.start_button.setEnabled(True)
                      self.check_button.setEnabled(True)
+                     self.status_label.setText("Ready")
             else:
                  self.log("Failed to obtain valid credentials after OAuth flow.", "error")
                  QMessageBox.critical(self, "Authentication Error", "Could not obtain valid credentials. Please check console logs and ensure you completed the authorization.")
-                 self.start_button.setEnabled(False)
-                 self.check_button.setEnabled(False)
+                 self.status_label.setText("Not Connected")
 
 
         except Exception as e:
             self.log(f"Failed to connect to Gmail API: {str(e)}", "error")
             QMessageBox.critical(self, "Connection Error",
                                 f"Failed to connect to Gmail API: {str(e)}\nPlease check your internet connection and {creds_path}.")
-            self.start_button.setEnabled(False)
-            self.check_button.setEnabled(False)
+            self.status_label.setText("Not Connected")
 
 
     # --- start_monitoring ---
@@ -378,8 +493,10 @@ class GmailMonitor(QMainWindow):
         self.search_term = self.search_term_input.text().strip()
         self.days_to_search = self.days_spinner.value()
         self.check_interval = self.interval_spinner.value()
+        self.max_attachment_bytes = self.max_size_spinner.value() * 1024 * 1024
+        self.search_contents = self.search_contents_check.isChecked()
 
-        if not self.search_term:
+        if not split_search_terms(self.search_term):
             QMessageBox.warning(self, "Input Error", "Please enter a keyword to search for in attachments.")
             return
 
@@ -389,6 +506,8 @@ class GmailMonitor(QMainWindow):
         self.search_term_input.setEnabled(False)
         self.days_spinner.setEnabled(False)
         self.interval_spinner.setEnabled(False)
+        self.max_size_spinner.setEnabled(False)
+        self.search_contents_check.setEnabled(False)
 
         status_msg = f"Monitoring attachments for: '{self.search_term}' every {self.check_interval}s"
         self.status_text.setText(status_msg)
@@ -397,10 +516,11 @@ class GmailMonitor(QMainWindow):
         self.monitor_progress.setValue(0) # Reset manual progress bar
 
         self.running = True
+        self._empty_streak = 0 # Start at the configured interval
         self.monitor_thread = EmailCheckerThread(self) # Pass self
         self.monitor_thread.log_signal.connect(self.log)
         self.monitor_thread.update_signal.connect(self.update_ui) # If thread emits update signal
-        # self.monitor_thread.progress_signal.connect(self.progress_bar.setValue) # Connect interval progress
+        self.monitor_thread.last_check_signal.connect(self.last_check_label.setText)
         self.monitor_thread.start()
 
         self.log(status_msg, "info")
@@ -413,7 +533,7 @@ class GmailMonitor(QMainWindow):
         self.running = False
         if self.monitor_thread and self.monitor_thread.isRunning():
             self.log("Stopping monitoring thread...", "info")
-            self.monitor_thread.running = False # Signal thread to stop
+            self.monitor_thread.stop() # Signal thread to stop, waking it if it is between checks
             self.monitor_thread.quit() # Request event loop exit
             if not self.monitor_thread.wait(5000): # Wait up to 5s
                  self.log("Monitoring thread did not stop gracefully, terminating.", "warning")
@@ -430,6 +550,8 @@ class GmailMonitor(QMainWindow):
         self.search_term_input.setEnabled(True)
         self.days_spinner.setEnabled(True)
         self.interval_spinner.setEnabled(True)
+        self.max_size_spinner.setEnabled(True)
+        self.search_contents_check.setEnabled(True)
 
         self.status_text.setText("Monitoring stopped.")
         self.status_label.setText("Ready" if self.service else "Not Connected")
@@ -455,8 +577,10 @@ class GmailMonitor(QMainWindow):
 
         self.search_term = self.search_term_input.text().strip()
         self.days_to_search = self.days_spinner.value()
+        self.max_attachment_bytes = self.max_size_spinner.value() * 1024 * 1024
+        self.search_contents = self.search_contents_check.isChecked()
 
-        if not self.search_term:
+        if not split_search_terms(self.search_term):
             QMessageBox.warning(self, "Input Error", "Please enter a keyword to search for in attachments.")
             return
 
@@ -464,24 +588,35 @@ class GmailMonitor(QMainWindow):
         self.start_button.setEnabled(False) # Disable start during manual check
         self.stop_button.setEnabled(False) # Disable stop during manual check
 
-        self.monitor_progress.setValue(0)
+        self.monitor_progress.setRange(0, 0) # Busy indicator until the check reports real progress
         self.status_text.setText(f"Manual check running for: '{self.search_term}'...")
         self.status_label.setText("Manual check in progress...")
 
         # Create and start thread
         self.manual_thread = ManualCheckThread(self) # Pass self
-        self.manual_thread.progress_signal.connect(self.monitor_progress.setValue)
+        self.manual_thread.progress_signal.connect(self._set_manual_progress)
         self.manual_thread.finished_signal.connect(self.manual_check_finished)
+        self.manual_thread.update_signal.connect(self.update_ui)
+        self.manual_thread.last_check_signal.connect(self.last_check_label.setText)
         self.manual_thread.start()
 
         self.log(f"Manual check started for attachments containing '{self.search_term}'", "info")
 
 
+    # --- _set_manual_progress ---
+    def _set_manual_progress(self, value):
+        """Show manual check progress, switching the bar out of busy mode on the first report"""
+        if self.monitor_progress.maximum() == 0:
+            self.monitor_progress.setRange(0, 100)
+        self.monitor_progress.setValue(value)
+
+
     # --- manual_check_finished ---
     def manual_check_finished(self):
         """Called when manual check is finished"""
         # ... (Keep implementation) ...
         self.manual_thread = None # Clear thread reference
+        self.monitor_progress.setRange(0, 100) # Leave busy mode if no progress was ever reported
 
         # Re-enable buttons appropriately
         self.check_button.setEnabled(True if self.service else False)
@@ -503,148 +638,327 @@ class GmailMonitor(QMainWindow):
         # ... (Keep full implementation as in your original script) ...
         # Make sure it uses self.log, self.service, self.search_term, etc.
         # Make sure it uses the imported `get_email_body` and `get_attachments_info`
-        # Make sure it calls self.download_attachment and self.extract_text_from_attachment
+        # Make sure it calls self.download_attachments_batch and extractors.scan_attachment
         if not self.service:
             self.log("Gmail service not available for check_emails.", "error")
             if manual_thread: manual_thread.progress_signal.emit(0)
             return
+        # This runs on the checking thread; widgets are only updated through its signals
+        checker = manual_thread or self.monitor_thread
         try:
-            now = datetime.datetime.now()
-            after_date = now - datetime.timedelta(days=self.days_to_search)
-            after_str = after_date.strftime('%Y/%m/%d')
-            query = f'has:attachment after:{after_str}'
-
-            self.log(f"Executing query: {query}", "info")
-            request = self.service.users().messages().list(userId='me', q=query, maxResults=100) # Increase maxResults?
-            response = request.execute()
-            messages = response.get('messages', [])
-            total_messages_to_process = len(messages)
+            self._reset_processed_if_settings_changed()
+            messages = None
             processed_count = 0
-            page_token = response.get('nextPageToken')
-
-            # --- Pagination Handling ---
-            while page_token:
-                if manual_thread is None and self.monitor_thread and not self.monitor_thread.running:
-                    self.log("Monitoring stopped during pagination.", "info")
-                    break # Exit pagination loop
-                self.log(f"Fetching next page of results...", "info")
-                request = self.service.users().messages().list(userId='me', q=query, maxResults=100, pageToken=page_token)
+            # Scheduled checks only need what arrived since the last one; manual checks re-scan the window
+            start_history_id = self._processed_store.get_value('last_history_id')
+            if manual_thread is None and start_history_id:
+                messages, new_history_id = self._list_new_messages(start_history_id)
+            # The history delta lists every new message, not just those with attachments
+            from_history = messages is not None
+
+            if messages is None:
+                # Note the mailbox position before listing so the next delta check can't miss
+                # anything that arrives while this one runs
+                new_history_id = self.service.users().getProfile(userId='me', fields='historyId').execute().get('historyId')
+
+                now = datetime.datetime.now()
+                after_date = now - datetime.timedelta(days=self.days_to_search)
+                after_str = after_date.strftime('%Y/%m/%d')
+                query = f'has:attachment after:{after_str}'
+
+                self.log(f"Executing query: {query}", "info")
+                request = self.service.users().messages().list(userId='me', q=query, maxResults=100) # Increase maxResults?
                 response = request.execute()
-                messages.extend(response.get('messages', []))
+                messages = response.get('messages', [])
                 page_token = response.get('nextPageToken')
-                total_messages_to_process = len(messages) # Update total count
-            # --- End Pagination ---
+
+                # --- Pagination Handling ---
+                while page_token:
+                    if manual_thread is None and self.monitor_thread and not self.monitor_thread.running:
+                        self.log("Monitoring stopped during pagination.", "info")
+                        new_history_id = None # Listing incomplete; don't skip ahead
+                        break # Exit pagination loop
+                    self.log(f"Fetching next page of results...", "info")
+                    request = self.service.users().messages().list(userId='me', q=query, maxResults=100, pageToken=page_token)
+                    response = request.execute()
+                    messages.extend(response.get('messages', []))
+                    page_token = response.get('nextPageToken')
+                # --- End Pagination ---
+            total_messages_to_process = len(messages)
 
             if not messages:
                 self.log(f"No emails with attachments found matching criteria.", "info")
+                self._empty_streak += 1
+                if new_history_id:
+                    self._processed_store.set_value('last_history_id', new_history_id)
                 if manual_thread: manual_thread.progress_signal.emit(100)
-                self.last_check_label.setText(f"Last Check: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+                checker.last_check_signal.emit(f"Last Check: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
                 return
 
-            self.log(f"Found ~{total_messages_to_process} potential emails with attachments to check.", "info")
+            if not from_history: # _list_new_messages already logged how many arrived
+                self.log(f"Found ~{total_messages_to_process} potential emails with attachments to check.", "info")
+            # Set when a message is left unprocessed for a later check to retry; the saved mailbox
+            # position must then stay put, or scheduled (delta) checks would never list it again
+            retry_pending = False
 
             new_emails_matched = 0
-            search_term_lower = self.search_term.lower()
-
-            for i, message_summary in enumerate(messages):
-                 # Check cancellation flag (important for responsiveness)
-                 if manual_thread is None and self.monitor_thread and not self.monitor_thread.running:
-                      self.log("Monitoring stopped during check.", "info")
-                      break # Exit the loop
-                 if manual_thread and not self.manual_thread: # Check if manual thread still exists
-                      self.log("Manual check cancelled.", "info")
-                      break
-
-                 msg_id = message_summary['id']
-
-                 # Skip if already processed OR already in matched list
-                 if msg_id in self.processed_ids or any(email['id'] == msg_id for email in self.matched_emails):
-                      processed_count += 1
-                      if manual_thread:
-                           progress = int(((processed_count) / total_messages_to_process) * 90) + 10
-                           manual_thread.progress_signal.emit(progress)
-                      continue
-
-                 try:
-                      # Get full message details
-                      # Consider adding fields='id,payload(headers,parts,body),internalDate' to optimize?
-                      msg = self.service.users().messages().get(userId='me', id=msg_id, format='full').execute()
-                      payload = msg.get('payload')
-                      if not payload:
-                           self.log(f"No payload found for message {msg_id}", "warning")
-                           self.processed_ids.add(msg_id) # Mark processed
-                           processed_count += 1
-                           continue # Skip to next message
-
-                      headers = payload.get('headers', [])
-                      subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
-                      sender = next((h['value'] for h in headers if h['name'].lower() == 'date'), '') # Use imported util
-                      date_str = next((h['value'] for h in headers if h['name'].lower() == 'date'), '')
-
-                      # Find attachments using imported util
-                      attachments = get_attachments_info(payload.get('parts'))
-                      if not attachments:
-                           self.log(f"Message {msg_id} had 'has:attachment' but no attachments found via parsing.", "warning")
-                           self.processed_ids.add(msg_id)
-                           processed_count += 1
-                           continue
-
-                      match_found_in_attachment = False
-                      matched_filenames = []
-                      for attachment_info in attachments:
-                           filename = attachment_info['filename']
-                           att_id = attachment_info['attachmentId']
-                           mime_type = attachment_info['mimeType']
-
-                           self.log(f"Checking attachment: {filename} ({mime_type}) in email {msg_id}", "debug") # Use debug level?
-
-                           attachment_data = self.download_attachment(msg_id, att_id)
-                           if not attachment_data:
-                                continue
-
-                           attachment_text = self.extract_text_from_attachment(attachment_data, mime_type, filename)
-
-                           if search_term_lower in attachment_text.lower():
-                               self.log(f"Keyword '{self.search_term}' FOUND in attachment: {filename}", "success")
-                               match_found_in_attachment = True
-                               matched_filenames.append(filename)
-                               # break # Optional: stop checking other attachments in this email
-
-                      if match_found_in_attachment:
-                           body = get_email_body(msg) # Use imported util
-                           timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-
-                           email_data = {
-                               'id': msg_id,
-                               'timestamp': timestamp,
-                               'sender': sender,
-                               'subject': subject,
-                               'body': body,
-                               'match_type': "Attachment",
-                               'date': date_str,
-                               'attachments_info': attachments,
-                               'matched_filenames': matched_filenames
-                           }
-
-                           self.matched_emails.append(email_data)
-                           new_emails_matched += 1
-
-                      self.processed_ids.add(msg_id) # Mark as processed
-
-                 except Exception as fetch_err:
-                      self.log(f"Error processing message {msg_id}: {str(fetch_err)}", "error")
-                      self.processed_ids.add(msg_id) # Mark processed even on error
-
-                 finally:
-                      processed_count += 1
-                      if manual_thread:
-                           progress = int(((processed_count) / total_messages_to_process) * 90) + 10
-                           manual_thread.progress_signal.emit(progress)
+            # One case-insensitive regex for all comma-separated terms: each text is scanned once,
+            # without lower-casing a copy of it
+            self._search_re = compile_search_pattern(split_search_terms(self.search_term))
+
+            # Skip already processed OR already matched messages before fetching anything
+            pending_ids = []
+            seen_ids = set() # Mail arriving mid-pagination can list an id on two pages; a batch rejects repeats
+            for message_summary in messages:
+                msg_id = message_summary['id']
+                if msg_id in self.processed_ids or msg_id in self._matched_ids or msg_id in seen_ids:
+                    processed_count += 1
+                else:
+                    seen_ids.add(msg_id)
+                    pending_ids.append(msg_id)
+            last_progress = -1 # Last value sent to the progress bar; only changes are emitted
+            if manual_thread and total_messages_to_process:
+                last_progress = int(((processed_count) / total_messages_to_process) * 90) + 10
+                manual_thread.progress_signal.emit(last_progress)
+
+            cancelled = False
+            chunks = [pending_ids[i:i + self.BATCH_SIZE] for i in range(0, len(pending_ids), self.BATCH_SIZE)]
+            # One HTTP round trip per chunk instead of one per message. Only structure is fetched
+            # here; bodies are fetched later for matches only. The next chunk's metadata is fetched
+            # in the background while the current chunk's attachments are downloaded and scanned.
+            prefetcher = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+            prefetch_http = self._new_http() # httplib2 isn't thread-safe; the prefetch thread gets its own
+            if chunks:
+                next_fetch = prefetcher.submit(self.fetch_messages_batch, chunks[0], self.METADATA_FIELDS, prefetch_http)
+            chunk_index = 0
+            while not cancelled and chunk_index < len(chunks):
+                chunk = chunks[chunk_index]
+                chunk_index += 1
+                fetched = next_fetch.result()
+                if chunk_index < len(chunks):
+                    next_fetch = prefetcher.submit(self.fetch_messages_batch, chunks[chunk_index],
+                                                   self.METADATA_FIELDS, prefetch_http)
+
+                candidates = {} # msg_id -> parsed message info awaiting attachment scan results
+                to_download = [] # (msg_id, attachment_info) not found in the text cache
+                futures = {} # future -> (msg_id, attachment_info)
+                for msg_id in chunk:
+                     # Check cancellation flag (important for responsiveness)
+                     if self._check_cancelled(manual_thread):
+                          cancelled = True
+                          break # Exit the loop
+
+                     msg = fetched.get(msg_id)
+                     if msg is None:
+                          # Fetch failed (already logged); leave unprocessed so the next check retries it
+                          retry_pending = True
+                          processed_count += 1
+                          continue
+
+                     try:
+                          payload = msg.get('payload')
+                          if not payload:
+                               self.log(f"No payload found for message {msg_id}", "warning")
+                               self.processed_ids.add(msg_id) # Mark processed
+                               processed_count += 1
+                               continue # Skip to next message
+
+                          headers = get_headers(payload.get('headers', []), ('subject', 'from'))
+                          subject = headers['subject'] or 'No Subject'
+                          sender = headers['from'] or ''
+                          # internalDate is a UTC epoch in ms; unlike the Date header it needs no parsing
+                          internal_date = msg.get('internalDate')
+                          received = (datetime.datetime.fromtimestamp(int(internal_date) / 1000, tz=datetime.timezone.utc).astimezone()
+                                      if internal_date else None)
+
+                          # Find attachments using imported util
+                          attachments = get_attachments_info(payload.get('parts'))
+                          if not attachments:
+                               if from_history:
+                                    self.log("Message %s has no attachments, skipping.", "debug", args=(msg_id,))
+                               else:
+                                    self.log(f"Message {msg_id} had 'has:attachment' but no attachments found via parsing.", "warning")
+                               self.processed_ids.add(msg_id)
+                               processed_count += 1
+                               continue
+
+                          candidates[msg_id] = {
+                              'msg': msg,
+                              'subject': subject,
+                              'sender': sender,
+                              'date': received,
+                              'attachments': attachments,
+                              'hits': set(),
+                              'incomplete': False, # Some attachments went unchecked; don't mark processed without a match
+                          }
+
+                          # A keyword in a file name is a match on its own, so nothing needs downloading
+                          filename_hits = {att['filename'] for att in attachments if self._search_re.search(att['filename'])}
+                          if filename_hits:
+                               for filename in filename_hits:
+                                    self.log(f"Keyword '{self.search_term}' FOUND in attachment name: {filename}", "success")
+                               candidates[msg_id]['hits'] = filename_hits
+                               continue
+                          if not self.search_contents:
+                               # File names were all there was to check. Turning content search on changes the
+                               # scan settings, which clears processed ids, so these are re-checked then.
+                               continue
+
+                          # Size and type are in the metadata, so filter before downloading anything
+                          for attachment_info in attachments:
+                               filename = attachment_info['filename']
+                               if not is_text_extractable(attachment_info['mimeType'], filename):
+                                    self.log("Skipping %s: unsupported type %s", "debug", args=(filename, attachment_info['mimeType']))
+                                    continue
+                               if attachment_info['size'] > self.max_attachment_bytes:
+                                    self.log(f"Skipping {filename}: {attachment_info['size']} bytes > limit", "info")
+                                    continue
+
+                               # Attachments seen in an earlier check are searched straight from the cache
+                               attachment_text = self._att_cache.get(self._attachment_cache_key(msg_id, attachment_info))
+                               if attachment_text is None:
+                                    to_download.append((msg_id, attachment_info))
+                                    continue
+                               self.log("Using cached text for attachment: %s", "debug", args=(filename,))
+                               if self._search_re.search(attachment_text):
+                                    self.log(f"Keyword '{self.search_term}' FOUND in attachment: {filename}", "success")
+                                    candidates[msg_id]['hits'].add(filename)
+
+                     except Exception as fetch_err:
+                          self.log(f"Error processing message {msg_id}: {str(fetch_err)}", "error")
+                          self.processed_ids.add(msg_id) # Mark processed even on error
+                          processed_count += 1
+
+                # Download the rest in batch requests; extraction of one batch overlaps the next download
+                for download_batch in self._attachment_batches(to_download):
+                     if cancelled or self._check_cancelled(manual_thread):
+                          cancelled = True
+                          break
+                     for (msg_id, attachment_info), attachment_data in zip(download_batch, self.download_attachments_batch(download_batch)):
+                          if not attachment_data:
+                               candidates[msg_id]['incomplete'] = True
+                          else:
+                               self.log("Checking attachment: %s (%s) in email %s", "debug",
+                                        args=(attachment_info['filename'], attachment_info['mimeType'], msg_id))
+                               attachment_source = self._spool_attachment(attachment_data, attachment_info['filename'])
+                               fut = self._extract_pool.submit(scan_attachment, attachment_source, attachment_info['mimeType'],
+                                                               attachment_info['filename'], self._search_re)
+                               if isinstance(attachment_source, str):
+                                    fut.add_done_callback(lambda _fut, path=attachment_source: self._spool_scan_done(_fut, path))
+                               futures[fut] = (msg_id, attachment_info, attachment_source)
+
+                # --- Collect attachment scan results as they complete ---
+                crashed = [] # (msg_id, attachment_info, attachment_source) of scans lost to a crashed worker
+                for fut in concurrent.futures.as_completed(futures):
+                     if not cancelled and self._check_cancelled(manual_thread):
+                          cancelled = True
+                     if cancelled:
+                          for pending in futures:
+                               pending.cancel()
+                          break
+                     msg_id, attachment_info, _source = futures[fut]
+                     try:
+                          result = fut.result()
+                     except concurrent.futures.BrokenExecutor:
+                          crashed.append(futures[fut])
+                          continue
+                     except Exception as scan_err:
+                          self.log(f"Error scanning attachment in message {msg_id}: {str(scan_err)}", "error")
+                          continue
+                     self._record_scan_result(candidates[msg_id], msg_id, attachment_info, result)
+
+                if crashed:
+                     # A crashed worker (e.g. a parser segfault on a malformed file) poisons the whole pool and
+                     # fails every scan still in flight. Those are scanned again one at a time on a fresh pool,
+                     # so only the attachment that actually crashes a worker is given up on.
+                     self.log(f"Attachment worker process crashed; re-scanning {len(crashed)} attachment(s) one at a time.", "error")
+                     self._restart_extract_pool()
+                     try:
+                          for msg_id, attachment_info, attachment_source in crashed:
+                               if cancelled or self._check_cancelled(manual_thread):
+                                    cancelled = True
+                                    break
+                               filename = attachment_info['filename']
+                               try:
+                                    result = self._extract_pool.submit(scan_attachment, attachment_source, attachment_info['mimeType'],
+                                                                       filename, self._search_re).result()
+                               except concurrent.futures.BrokenExecutor:
+                                    self.log(f"Skipping attachment {filename} in message {msg_id}: it crashes the text extractor.", "error")
+                                    self._restart_extract_pool()
+                                    continue
+                               except Exception as scan_err:
+                                    self.log(f"Error scanning attachment in message {msg_id}: {str(scan_err)}", "error")
+                                    continue
+                               self._record_scan_result(candidates[msg_id], msg_id, attachment_info, result)
+                     finally:
+                          for _msg_id, _attachment_info, attachment_source in crashed:
+                               if isinstance(attachment_source, str):
+                                    self._remove_spool_file(attachment_source)
+
+                if cancelled:
+                     break # Leave unfinished messages unprocessed so they are re-checked next time
+
+                # Stage 2: fetch full bodies, but only for messages that matched
+                matched_ids = [msg_id for msg_id, info in candidates.items() if info['hits']]
+                full_messages = self.fetch_messages_batch(matched_ids, self.MESSAGE_FIELDS) if matched_ids else {}
+
+                for msg_id, info in candidates.items():
+                     try:
+                          if info['hits']:
+                               # Decoded once per match; the detail store below is the by-id body cache
+                               # that show_email_details reads, so nothing decodes it again
+                               body = get_email_body(full_messages.get(msg_id, info['msg'])) # Use imported util
+                               timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                               # Keep filenames in attachment order regardless of completion order
+                               matched_filenames = [att['filename'] for att in info['attachments']
+                                                    if att['filename'] in info['hits']]
+
+                               # Only summary fields stay in memory; show_email_details reads the rest back
+                               self._detail_store.put(msg_id, body, info['attachments'])
+                               email_data = {
+                                   'id': msg_id,
+                                   'timestamp': timestamp,
+                                   'sender': info['sender'],
+                                   'subject': info['subject'],
+                                   'match_type': "Attachment",
+                                   'date': info['date'],
+                                   'matched_filenames': matched_filenames
+                               }
+
+                               self.matched_emails.append(email_data)
+                               self._matched_ids.add(msg_id)
+                               new_emails_matched += 1
+
+                          elif info['incomplete']:
+                               retry_pending = True
+                               continue # Not every attachment was checked; leave unprocessed so a later check retries it
+
+                          self.processed_ids.add(msg_id) # Mark as processed
+
+                     except Exception as process_err:
+                          self.log(f"Error processing message {msg_id}: {str(process_err)}", "error")
+                          self.processed_ids.add(msg_id) # Mark processed even on error
+
+                     finally:
+                          processed_count += 1
+                          if manual_thread:
+                               progress = int(((processed_count) / total_messages_to_process) * 90) + 10
+                               if progress != last_progress: # Each emit is a cross-thread event and a repaint
+                                    manual_thread.progress_signal.emit(progress)
+                                    last_progress = progress
+
+                # Persist once per chunk rather than once per message
+                self._processed_store.add_many(msg_id for msg_id in chunk if msg_id in self.processed_ids)
+            prefetcher.shutdown(wait=False, cancel_futures=True)
 
             # --- After processing all messages ---
+            self._empty_streak = 0 if new_emails_matched else self._empty_streak + 1
+            if new_history_id and not cancelled and not retry_pending:
+                self._processed_store.set_value('last_history_id', new_history_id)
+
             if new_emails_matched > 0:
                 self.log(f"Found {new_emails_matched} new emails with matching attachments.", "success")
-                self.update_ui() # Update the list and counts
+                checker.update_signal.emit() # Update the list and counts, on the GUI thread
                 self.send_notification(f"{new_emails_matched} new emails found",
                                       f"Found {new_emails_matched} emails with attachments containing '{self.search_term}'")
             elif total_messages_to_process > 0:
@@ -653,172 +967,281 @@ class GmailMonitor(QMainWindow):
                  # This case was handled earlier if messages list was initially empty
                  pass
 
-            self.last_check_label.setText(f"Last Check: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            checker.last_check_signal.emit(f"Last Check: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
         except Exception as e:
             self.log(f"Error checking emails: {str(e)}", "error")
             if manual_thread: manual_thread.progress_signal.emit(0)
 
 
-    # --- download_attachment (Keep here or move to utils) ---
-    def download_attachment(self, msg_id, attachment_id):
-        """Download attachment data using attachmentId."""
-        # ... (Keep full implementation) ...
-        try:
-            attachment = self.service.users().messages().attachments().get(
-                userId='me', messageId=msg_id, id=attachment_id).execute()
-            data = attachment.get('data')
-            if data:
-                # Add padding if needed for urlsafe_b64decode
-                missing_padding = len(data) % 4
-                if missing_padding:
-                    data += '='* (4 - missing_padding)
-                return base64.urlsafe_b64decode(data.encode('UTF-8'))
-            else:
-                self.log(f"No data found for attachment {attachment_id} in message {msg_id}", "warning")
-                return None
-        except Exception as e:
-            self.log(f"Error downloading attachment {attachment_id} for message {msg_id}: {str(e)}", "error")
-            return None
+    # --- _reset_processed_if_settings_changed ---
+    def _reset_processed_if_settings_changed(self):
+        """
+        Forget processed ids recorded under a different keyword, attachment size
+        limit or content search setting; a message that had no match then may have
+        one now, so it is checked again (from the text cache where possible).
+        """
+        settings = json.dumps([sorted(term.lower() for term in split_search_terms(self.search_term)),
+                               self.max_attachment_bytes, self.search_contents])
+        if self._processed_store.get_value('scan_settings') == settings:
+            return
+        if self.processed_ids:
+            self.log("Search settings changed; re-checking previously processed emails.", "info")
+        self.processed_ids = set()
+        self._processed_store.clear()
+        self._processed_store.set_value('last_history_id', None) # Next check lists the full window again
+        self._processed_store.set_value('scan_settings', settings)
 
 
-    # --- extract_text_from_attachment (Keep here or move to utils) ---
-    def extract_text_from_attachment(self, attachment_data, mime_type, filename):
-        """Extract text from various attachment types."""
-        # ... (Keep full implementation, using self.log) ...
-        text = ""
+    # --- _new_http ---
+    def _new_http(self):
+        """Return a new authorized HTTP connection, for API calls made off the checking thread."""
+        return google_auth_httplib2.AuthorizedHttp(self.creds, http=httplib2.Http())
+
+
+    # --- _list_new_messages ---
+    def _list_new_messages(self, start_history_id):
+        """
+        List messages added to the mailbox since start_history_id using history.list,
+        which is a single cheap call when nothing has changed.
+
+        Returns (messages, latest_history_id), or (None, None) if Gmail no longer has
+        history that far back and a full listing is needed.
+        """
+        messages = {} # msg_id -> message, deduplicated in arrival order
+        history_id = start_history_id
+        page_token = None
         try:
-            # --- Plain Text ---
-            if mime_type.startswith('text/plain') or filename.lower().endswith('.txt'):
-                # Try common encodings
-                for encoding in ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']:
-                    try:
-                        text = attachment_data.decode(encoding)
-                        break
-                    except UnicodeDecodeError:
-                        continue
-                else:
-                     self.log(f"Could not decode text file: {filename} with common encodings.", "warning")
-                     text = "[Could not decode text]"
+            while True:
+                response = self.service.users().history().list(
+                    userId='me', startHistoryId=start_history_id, historyTypes=['messageAdded'],
+                    pageToken=page_token).execute()
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        message = added['message']
+                        # messages.list skips these by default, so do the same here
+                        if not self.SKIPPED_LABELS.intersection(message.get('labelIds', [])):
+                            messages[message['id']] = message
+                history_id = response.get('historyId', history_id)
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as e:
+            if e.resp.status == 404:
+                self.log("Saved mailbox position has expired; running a full check.", "info")
+                return None, None
+            raise
 
-            # --- PDF ---
-            elif mime_type == 'application/pdf' or filename.lower().endswith('.pdf'):
-                try:
-                    with io.BytesIO(attachment_data) as f:
-                        reader = PyPDF2.PdfReader(f, strict=False)
-                        if reader.is_encrypted:
-                             self.log(f"Skipping encrypted PDF: {filename}", "warning")
-                             text = "[Encrypted PDF - Cannot Extract Text]"
-                        else:
-                             for page in reader.pages:
-                                  try:
-                                       page_text = page.extract_text()
-                                       if page_text:
-                                            text += page_text + "\n"
-                                  except Exception as page_err:
-                                       self.log(f"Error extracting text from page in PDF '{filename}': {page_err}", "warning")
-                                       continue # Try next page
-                             if not text and len(reader.pages) > 0:
-                                  self.log(f"Could not extract text from PDF: {filename} (possibly image-based)", "warning")
-                                  text = "[Could not extract text from PDF - Image Based?]"
-                except PyPDF2.errors.PdfReadError as pdf_err:
-                     self.log(f"Error reading PDF file '{filename}': {pdf_err}", "warning")
-                     text = "[Invalid or Corrupted PDF]"
-                except Exception as pdf_gen_err:
-                    self.log(f"General error processing PDF '{filename}': {pdf_gen_err}", "error")
-                    text = "[Error Processing PDF]"
-
-
-            # --- DOCX ---
-            elif mime_type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document' or filename.lower().endswith('.docx'):
-                 try:
-                     with io.BytesIO(attachment_data) as f:
-                         doc = docx.Document(f)
-                         full_text = [para.text for para in doc.paragraphs]
-                         text = "\n".join(full_text)
-                 except Exception as docx_err:
-                      self.log(f"Error reading DOCX file '{filename}': {docx_err}", "warning")
-                      text = "[Error reading DOCX file]"
-
-            # --- CSV ---
-            elif mime_type == 'text/csv' or filename.lower().endswith('.csv'):
-                decoded_text = ""
-                try:
-                    # Try decoding first
-                    for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                         try:
-                              decoded_text = attachment_data.decode(encoding)
-                              break
-                         except UnicodeDecodeError:
-                              continue
-                    else:
-                         raise ValueError("Could not decode CSV with common encodings")
-
-                    with io.StringIO(decoded_text) as f:
-                         # Read robustly, convert all columns to string before joining
-                         df = pd.read_csv(f, on_bad_lines='warn', dtype=str, engine='python') # Use python engine for flexibility
-                         df.fillna('', inplace=True) # Replace NaN with empty string
-                         text = df.to_string(index=False, na_rep='') # Convert entire DataFrame to string
-                except Exception as csv_err:
-                     self.log(f"Error reading CSV file '{filename}': {csv_err}", "warning")
-                     text = "[Error reading CSV file]"
-                     if decoded_text: # If decode worked but pandas failed, provide raw text
-                          text += "\n[Raw Decoded Content:\n" + decoded_text[:1000] + "...]" # Limit raw preview
-
-
-            # --- XLSX ---
-            elif mime_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' or filename.lower().endswith('.xlsx'):
-                 try:
-                     with io.BytesIO(attachment_data) as f:
-                          xls = pd.ExcelFile(f, engine='openpyxl')
-                          all_sheets_text = []
-                          for sheet_name in xls.sheet_names:
-                               try:
-                                   # Read robustly, convert all to string
-                                   df = xls.parse(sheet_name, dtype=str)
-                                   df.fillna('', inplace=True)
-                                   sheet_content = df.to_string(index=False, na_rep='')
-                                   all_sheets_text.append(f"--- Sheet: {sheet_name} ---\n{sheet_content}")
-                               except Exception as sheet_err:
-                                   self.log(f"Error reading sheet '{sheet_name}' in XLSX '{filename}': {sheet_err}", "warning")
-                                   all_sheets_text.append(f"--- Sheet: {sheet_name} ---\n[Error reading sheet]")
-
-                          text = "\n\n".join(all_sheets_text)
-                 except Exception as xlsx_err:
-                     self.log(f"Error reading XLSX file '{filename}': {xlsx_err}", "warning")
-                     text = "[Error reading XLSX file]"
-
-            # --- ZIP ---
-            elif mime_type in ['application/zip', 'application/x-zip-compressed'] or filename.lower().endswith('.zip'):
-                 try:
-                     with io.BytesIO(attachment_data) as f:
-                         with zipfile.ZipFile(f, 'r') as zf:
-                             text_parts = [f"--- ZIP Contents ({filename}) ---"]
-                             for member_info in zf.infolist():
-                                 # Basic info: filename and size
-                                 text_parts.append(f"- {member_info.filename} ({member_info.file_size} bytes)")
-                                 # Future: Add extraction and recursive search here if needed
-                             text = "\n".join(text_parts)
-                 except zipfile.BadZipFile:
-                      self.log(f"Could not read ZIP file (corrupted?): {filename}", "warning")
-                      text = "[Invalid ZIP file]"
-                 except Exception as zip_err:
-                      self.log(f"Error reading ZIP file '{filename}': {zip_err}", "warning")
-                      text = "[Error reading ZIP file]"
-
-            # --- Other/Unsupported ---
+        self.log(f"{len(messages)} new message(s) since the last check.", "info")
+        return list(messages.values()), history_id
+
+
+    # --- next_check_interval ---
+    def next_check_interval(self):
+        """
+        Seconds the monitoring thread waits before the next check: the configured
+        interval, doubled for each consecutive check without new matches (up to
+        16x, capped at an hour).
+        """
+        backoff = 2 ** min(self._empty_streak, self.MAX_BACKOFF_DOUBLINGS)
+        return max(self.check_interval, min(self.check_interval * backoff, self.MAX_CHECK_INTERVAL))
+
+
+    # --- _check_cancelled ---
+    def _check_cancelled(self, manual_thread):
+        """Return True (and log it) if the running check has been asked to stop."""
+        if manual_thread is None and self.monitor_thread and not self.monitor_thread.running:
+            self.log("Monitoring stopped during check.", "info")
+            return True
+        if manual_thread and not self.manual_thread: # Check if manual thread still exists
+            self.log("Manual check cancelled.", "info")
+            return True
+        return False
+
+
+    # --- fetch_messages_batch ---
+    def fetch_messages_batch(self, msg_ids, fields, http=None):
+        """
+        Fetch message resources for up to BATCH_SIZE ids in a single batch HTTP request,
+        limited to the given partial-response `fields` projection. Pass `http` when
+        calling from a thread other than the one that owns self.service.
+
+        Returns a dict of msg_id -> message. Messages whose fetch failed are logged
+        and left out of the result.
+        """
+        results = {}
+
+        def _on_msg(request_id, response, exception):
+            if exception is not None:
+                self.log(f"Error fetching message {request_id}: {exception}", "error")
             else:
-                # Only log if it's not a common non-text type we expect to ignore
-                common_ignored = ['image/', 'application/octet-stream'] # Add more if needed
-                if not any(mime_type.startswith(prefix) for prefix in common_ignored):
-                     self.log(f"Skipping unsupported attachment type: {filename} ({mime_type})", "info")
-                text = f"[Unsupported attachment type: {mime_type}]"
+                results[request_id] = response
+
+        batch = self.service.new_batch_http_request(callback=_on_msg)
+        for msg_id in msg_ids:
+            batch.add(self.service.users().messages().get(
+                userId='me', id=msg_id, format='full', fields=fields),
+                request_id=msg_id)
+        batch.execute(http=http)
+        return results
+
+
+    # --- _create_extract_pool ---
+    def _create_extract_pool(self):
+        """Create the process pool that runs extractors.scan_attachment."""
+        # spawn rather than fork: forking a process that is running Qt and other threads is unsafe
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.EXTRACT_WORKERS,
+                                                      mp_context=multiprocessing.get_context('spawn'))
+
+
+    # --- _restart_extract_pool ---
+    def _restart_extract_pool(self):
+        """Replace the extraction pool after a crashed worker process broke it."""
+        self._extract_pool.shutdown(wait=False, cancel_futures=True)
+        self._extract_pool = self._create_extract_pool()
+
+
+    # --- _record_scan_result ---
+    def _record_scan_result(self, candidate, msg_id, attachment_info, result):
+        """Apply one scan_attachment result to a candidate message: note a hit, or cache the extracted text."""
+        hit, attachment_text, worker_logs = result
+        for message, level in worker_logs:
+            self.log(message, level)
+        if hit:
+            self.log(f"Keyword '{self.search_term}' FOUND in attachment: {attachment_info['filename']}", "success")
+            candidate['hits'].add(attachment_info['filename'])
+        elif attachment_text is not None:
+            # Only complete, successful extractions come back with text, so the cache never
+            # holds a partial or failed one
+            self._att_cache.put(self._attachment_cache_key(msg_id, attachment_info), attachment_text)
+
+
+    # --- _spool_attachment ---
+    def _spool_attachment(self, attachment_data, filename):
+        """
+        Returns what to send an extraction worker for one attachment: the bytes, or for
+        attachments over SPOOL_ATTACHMENT_BYTES the path of a temp file holding them,
+        so large files aren't pickled through the process pool's pipe.
+        """
+        if len(attachment_data) <= self.SPOOL_ATTACHMENT_BYTES:
+            return attachment_data
+        try:
+            with tempfile.NamedTemporaryFile(prefix='gam_', suffix=os.path.splitext(filename)[1], delete=False) as f:
+                f.write(attachment_data)
+        except OSError as spool_err:
+            self.log(f"Could not spool attachment {filename} to disk, passing it in memory: {spool_err}", "warning")
+            return attachment_data
+        return f.name
+
+    # --- _spool_scan_done ---
+    @classmethod
+    def _spool_scan_done(cls, fut, path):
+        """Done callback of a scan reading a spooled file: delete the file, unless a worker crash means it is scanned again."""
+        if fut.cancelled() or not isinstance(fut.exception(), concurrent.futures.BrokenExecutor):
+            cls._remove_spool_file(path)
+
+    # --- _remove_spool_file ---
+    @staticmethod
+    def _remove_spool_file(path):
+        """Delete a temp file written by _spool_attachment."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass # Already gone, or (on Windows) still open in a worker that outlived a cancel
 
-        except Exception as e:
-            self.log(f"Critical error extracting text from {filename} ({mime_type}): {str(e)}", "error", exc_info=True) # Add stack trace
-            text = "[Error during text extraction]"
+    # --- _attachment_batches ---
+    def _attachment_batches(self, attachments):
+        """
+        Split (msg_id, attachment_info) pairs into download batches of at most
+        BATCH_SIZE calls and roughly ATTACHMENT_BATCH_BYTES of attachment data.
+        """
+        batch, batch_bytes = [], 0
+        for item in attachments:
+            size = item[1].get('size', 0)
+            if batch and (len(batch) >= self.BATCH_SIZE or batch_bytes + size > self.ATTACHMENT_BATCH_BYTES):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(item)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+
+    # --- _attachment_cache_key ---
+    def _attachment_cache_key(self, msg_id, attachment_info):
+        """Text cache key for an attachment."""
+        # attachmentId changes between API calls, so key on the message id + MIME part instead
+        return f"{msg_id}:{attachment_info.get('partId')}:{attachment_info['filename']}"
+
+
+    # --- _is_rate_limited ---
+    @staticmethod
+    def _is_rate_limited(exception):
+        """True if a batched call was rejected by Gmail's rate limiting (429, or 403 rateLimitExceeded)."""
+        if not isinstance(exception, HttpError):
+            return False
+        if exception.resp.status == 429:
+            return True
+        return exception.resp.status == 403 and b'rateLimitExceeded' in (exception.content or b'')
+
+
+    # --- download_attachments_batch (Keep here or move to utils) ---
+    def download_attachments_batch(self, attachments):
+        """
+        Download several attachments in a single batch HTTP request.
 
-        return text
+        Takes a list of (msg_id, attachment_info) pairs and returns a list of the
+        decoded bytes in the same order, with None for downloads that failed.
+        Calls rejected by Gmail's per-user rate limit are retried with backoff.
+        """
+        results = [None] * len(attachments)
+        rate_limited = []
+
+        def _on_attachment(request_id, response, exception):
+            index = int(request_id)
+            msg_id, attachment_info = attachments[index]
+            if exception is not None:
+                if self._is_rate_limited(exception):
+                    rate_limited.append(index)
+                    return
+                self.log(f"Error downloading attachment {attachment_info['filename']} for message {msg_id}: {exception}", "error")
+                return
+            data = response.get('data')
+            if not data:
+                self.log(f"No data found for attachment {attachment_info['filename']} in message {msg_id}", "warning")
+                return
+            # Work on ASCII bytes (what the decoder wants anyway) and pad only if Gmail left it off
+            data = data.encode('ascii')
+            missing_padding = -len(data) % 4
+            if missing_padding:
+                data += b'=' * missing_padding
+            results[index] = base64.urlsafe_b64decode(data)
+
+        pending = list(range(len(attachments)))
+        for attempt in range(self.BATCH_RETRIES + 1):
+            if attempt:
+                # Large batches can trip the per-user rate limit; wait and resend only the rejected calls
+                delay = 2 ** (attempt - 1)
+                self.log(f"{len(pending)} attachment download(s) rate limited, retrying in {delay}s", "warning")
+                time.sleep(delay)
+            rate_limited.clear()
+            batch = self.service.new_batch_http_request(callback=_on_attachment)
+            for index in pending:
+                msg_id, attachment_info = attachments[index]
+                batch.add(self.service.users().messages().attachments().get(
+                    userId='me', messageId=msg_id, id=attachment_info['attachmentId']),
+                    request_id=str(index))
+            try:
+                batch.execute()
+            except Exception as e:
+                self.log(f"Error downloading attachment batch: {str(e)}", "error")
+                break
+            if not rate_limited:
+                break
+            pending = sorted(rate_limited)
+        else:
+            self.log(f"Gave up on {len(pending)} rate-limited attachment download(s); leaving them for a later check", "error")
+        return results
 
 
     # --- update_ui ---
@@ -842,94 +1265,55 @@ class GmailMonitor(QMainWindow):
     # --- refresh_summaries ---
     def refresh_summaries(self):
         """Refresh the summaries tab"""
-        # ... (Keep implementation, use format_sender from utils) ...
         current_selection_id = None
-        selected_items = self.email_tree.selectedItems()
-        if selected_items:
-            current_selection_id = selected_items[0].data(0, Qt.ItemDataRole.UserRole)
-
-        self.email_tree.clear()
-        self.email_tree.setSortingEnabled(False) # Disable sorting during population
-
-        for email in self.matched_emails:
-            item = QTreeWidgetItem()
-            item.setText(0, email['timestamp'])
-            item.setText(1, format_sender(email['sender'])) # Use imported util
-            item.setText(2, email['subject'])
-            filenames_str = ", ".join(email.get('matched_filenames', ['N/A']))
-            item.setText(3, filenames_str)
-
-            item.setData(0, Qt.ItemDataRole.UserRole, email['id']) # Store email ID
-
-            # Tooltip for filenames column if it's long
-            item.setToolTip(3, filenames_str)
+        current = self.email_tree.currentIndex()
+        if current.isValid():
+            current_selection_id = current.data(Qt.ItemDataRole.UserRole)
 
-            # Background color can be set here or in theme update
-            # item.setBackground(0, QColor(self.theme["success"] + "40")) # Light success tint
-
-            self.email_tree.addTopLevelItem(item)
-
-        self.email_tree.setSortingEnabled(True) # Re-enable sorting
+        # One model reset; the proxy re-applies the current sort and filter itself
+        self.email_model.set_emails(self.matched_emails)
 
         # Restore selection if it still exists
-        if current_selection_id:
-            items = self.email_tree.findItems(current_selection_id, Qt.MatchFlag.MatchExactly | Qt.MatchFlag.MatchRecursive, 0) # Search by ID in data role
-            if items:
-                 self.email_tree.setCurrentItem(items[0])
-
-        # Apply current filter again after refresh
-        self.filter_summaries()
+        row = self.email_model.row_for_id(current_selection_id)
+        if row is not None:
+            index = self.email_proxy.mapFromSource(self.email_model.index(row, 0))
+            if index.isValid():
+                self.email_tree.setCurrentIndex(index)
 
 
     # --- filter_summaries ---
     def filter_summaries(self):
         """Filter the email list based on text input"""
-        # ... (Keep implementation) ...
-        filter_text = self.filter_input.text().lower().strip()
-        for i in range(self.email_tree.topLevelItemCount()):
-            item = self.email_tree.topLevelItem(i)
-            if not filter_text:
-                item.setHidden(False)
-            else:
-                # Check timestamp(0), sender(1), subject(2), matched files(3)
-                match = (filter_text in item.text(0).lower() or
-                         filter_text in item.text(1).lower() or
-                         filter_text in item.text(2).lower() or
-                         filter_text in item.text(3).lower())
-                item.setHidden(not match)
+        # Case-insensitive substring match over timestamp, sender, subject and matched files
+        self.email_proxy.set_filter_text(self.filter_input.text().strip())
 
 
     # --- show_email_details ---
-    def show_email_details(self, item):
+    def show_email_details(self, index):
         """Show details for selected email"""
         # ... (Keep implementation, use escape_html and format_body_text_no_highlight from utils) ...
-        email_id = item.data(0, Qt.ItemDataRole.UserRole)
-        email_data = next((e for e in self.matched_emails if e['id'] == email_id), None)
+        source_index = self.email_proxy.mapToSource(index)
+        email_data = self.email_model.email_at(source_index.row()) if source_index.isValid() else None
 
-        if email_data:
+        if email_data and email_data['id'] in self._details_html:
+            # Re-selecting an email skips the detail store read and body formatting
+            self.details_text.setHtml(self._details_html[email_data['id']])
+        elif email_data:
             # Use imported utils for escaping
             subject_safe = escape_html(email_data['subject'])
             sender_safe = escape_html(email_data['sender'])
-            date_safe = escape_html(email_data.get('date', 'N/A'))
+            received = email_data.get('date')
+            date_safe = escape_html(received.strftime('%a, %d %b %Y %H:%M:%S %Z') if received else 'N/A')
             match_type_safe = escape_html(email_data.get('match_type', 'N/A'))
 
-            details = f"""
-            <style>
-                h2 {{ margin-bottom: 5px; color: {self.theme['accent']}; }}
-                p {{ margin-top: 2px; margin-bottom: 8px; }}
-                b {{ color: {self.theme['text_primary']}; }}
-                ul {{ margin-top: 0px; padding-left: 20px; }}
-                li {{ margin-bottom: 3px; }}
-                hr {{ border: none; border-top: 1px solid {self.theme['border']}; margin-top: 10px; margin-bottom: 10px; }}
-                body {{ color: {self.theme['text_secondary']}; }} /* Default text color */
-            </style>
+            details = self._details_style + f"""
             <h2>{subject_safe}</h2>
             <p><b>From:</b> {sender_safe}</p>
             <p><b>Date:</b> {date_safe}</p>
             <p><b>Match Type:</b> {match_type_safe}</p>
             """
 
-            attachments = email_data.get('attachments_info', [])
+            body, attachments = self._detail_store.get(email_data['id']) or ('', [])
             matched_files = email_data.get('matched_filenames', [])
             if attachments:
                 details += "<p><b>Attachments:</b></p><ul>"
@@ -947,9 +1331,17 @@ class GmailMonitor(QMainWindow):
 
             details += "<hr>"
             # Use imported util for body formatting
-            formatted_body = format_body_text_no_highlight(email_data.get('body', ''))
+            # Bodies were decoded/parsed on the checker thread; the GUI thread only lays out the
+            # preview, so cap it to keep huge bodies from stalling the window on click
+            truncated = len(body) > self.BODY_PREVIEW_CHARS
+            formatted_body = format_body_text_no_highlight(body[:self.BODY_PREVIEW_CHARS] if truncated else body)
+            if truncated:
+                formatted_body += f"<br><i>[Preview truncated at {self.BODY_PREVIEW_CHARS:,} characters]</i>"
             details += f"<p><b>Body Preview:</b><br>{formatted_body}</p>" if formatted_body else "<p><i>No body preview available.</i></p>"
 
+            self._details_html[email_data['id']] = details
+            if len(self._details_html) > self.DETAILS_CACHE_SIZE:
+                del self._details_html[next(iter(self._details_html))]
             self.details_text.setHtml(details)
         else:
             self.details_text.setPlainText("Email details not found.")
@@ -967,8 +1359,13 @@ class GmailMonitor(QMainWindow):
 
         if reply == QMessageBox.StandardButton.Yes:
             self.matched_emails = []
+            self._matched_ids = set()
+            self._detail_store.clear()
+            self._details_html.clear()
             self.processed_ids = set() # Also clear processed IDs to allow re-checking
-            self.email_tree.clear()
+            self._processed_store.clear()
+            self._processed_store.set_value('last_history_id', None) # Next check lists the full window again
+            self.email_model.set_emails([])
             self.details_text.clear()
             self.total_emails_label.setText("Total Emails: 0")
             self.tab_widget.setTabText(2, "Matched Emails (0)") # Adjust index if needed
@@ -981,6 +1378,7 @@ class GmailMonitor(QMainWindow):
         # ... (Keep implementation) ...
         try:
             # Use plyer for cross-platform notifications
+            from plyer import notification
             notification.notify(
                 title=title,
                 message=message,
@@ -997,29 +1395,31 @@ class GmailMonitor(QMainWindow):
 
     # --- log ---
     # Keep implementation, ensure escape_html is used
-    def log(self, message, level="info", exc_info=False):
-        """Add message to log with appropriate color coding and timestamp."""
+    def log(self, message, level="info", exc_info=False, args=None):
+        """
+        Queue a message for the log with appropriate color coding and timestamp.
+
+        Safe to call from worker threads; entries are written to the log pane
+        in batches by _drain_log on the GUI thread. Messages below the selected
+        log level are dropped first thing. For frequent messages, pass a
+        %-style template plus `args` so formatting only happens if it is shown.
+        """
+        if self.LOG_LEVELS.get(level, 20) < self._log_level_num:
+            return
         try: # Add a try/except block for robustness within logging itself
+            if args:
+                message = message % args
             timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            level_upper = level.upper()
-
-            # Determine color based on theme and level
-            color = self.theme.get('text_primary', '#333333') # Default
-            if level == "error":
-                color = self.theme.get('error', '#F44336')
-            elif level == "warning":
-                color = self.theme.get('warning', '#FF9800')
-            elif level == "success":
-                color = self.theme.get('success', '#4CAF50')
-            elif level == "debug": # Add debug level
-                 color = self.theme.get('text_secondary', '#666666')
-                 level_upper = "DEBUG" # Display as DEBUG
+            # Wrapper and color per level are prebuilt for the current theme (_build_log_templates)
+            if level not in self._log_templates:
+                level = "info"
+            color = self._log_colors[level]
 
             # Escape the user-provided message content for safety
             safe_message = escape_html(str(message)) # Ensure message is string
 
             # Format the log entry as an HTML string
-            formatted_entry = f"<span style='color:{color};'>[{timestamp}] {level_upper}: {safe_message}</span>"
+            formatted_entry = self._log_templates[level].format(ts=timestamp, msg=safe_message)
 
             # Add traceback if requested (usually for errors)
             if exc_info:
@@ -1030,14 +1430,7 @@ class GmailMonitor(QMainWindow):
                  formatted_entry += f"<br/><pre style='color:{color}; font-size: 9px; margin-left: 10px; white-space: pre-wrap; word-wrap: break-word;'>{safe_tb}</pre>"
 
 
-            # --- CORRECTED LINE ---
-            # Use append() which handles HTML automatically for QTextEdit
-            self.log_text.append(formatted_entry)
-            # --------------------
-
-            # Auto-scroll to the bottom (ensure log_text widget exists)
-            if hasattr(self, 'log_text') and self.log_text:
-                self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
+            self._log_queue.append(formatted_entry)
 
         except Exception as log_err:
             # Fallback if logging itself fails
@@ -1049,25 +1442,108 @@ class GmailMonitor(QMainWindow):
                  print("---------------------------------------------")
 
 
+    # --- _build_log_templates ---
+    def _build_log_templates(self):
+        """Prebuild each log level's color and HTML wrapper for the current theme"""
+        self._log_colors = {
+            "info": self.theme.get('text_primary', '#333333'),
+            "success": self.theme.get('success', '#4CAF50'),
+            "warning": self.theme.get('warning', '#FF9800'),
+            "error": self.theme.get('error', '#F44336'),
+            "debug": self.theme.get('text_secondary', '#666666'),
+        }
+        self._log_templates = {level: f"<span style='color:{color};'>[{{ts}}] {level.upper()}: {{msg}}</span>"
+                               for level, color in self._log_colors.items()}
+
+
+    # --- set_log_level ---
+    def set_log_level(self, level_name):
+        """Show only log entries at or above the given level (e.g. "Warning")"""
+        self._log_level_num = self.LOG_LEVELS[level_name.lower()]
+
+
+    # --- _drain_log ---
+    def _drain_log(self):
+        """Write all queued log entries to the log pane in a single edit."""
+        if not self._log_queue:
+            return
+        entries = []
+        try:
+            while True:
+                entries.append(self._log_queue.popleft())
+        except IndexError:
+            pass
+
+        # One edit block = one relayout, however many entries arrived since the last flush. Each
+        # entry gets its own text block so LOG_MAX_BLOCKS bounds entries, not flushes.
+        cursor = QTextCursor(self.log_text.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.log_text.setUpdatesEnabled(False)
+        cursor.beginEditBlock()
+        try:
+            for entry in entries:
+                if not self.log_text.document().isEmpty():
+                    cursor.insertBlock()
+                cursor.insertHtml(entry)
+        finally:
+            cursor.endEditBlock()
+            self.log_text.setUpdatesEnabled(True)
+        # Auto-scroll to the bottom
+        self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
+
+
     # --- change_theme ---
     def change_theme(self, theme_name):
         """Change the application theme"""
         # ... (Keep implementation, use ThemeManager.apply_theme) ...
         # Ensure self.theme is updated
         self.theme = ThemeManager.apply_theme(self.window(), theme_name) # Apply to main window's app instance
+        self._build_log_templates()
+
+        self._details_html = {} # Rendered with the old theme's colors
+
+        # Style block of the details pane only depends on the theme, so build it once here
+        self._details_style = f"""
+            <style>
+                h2 {{ margin-bottom: 5px; color: {self.theme['accent']}; }}
+                p {{ margin-top: 2px; margin-bottom: 8px; }}
+                b {{ color: {self.theme['text_primary']}; }}
+                ul {{ margin-top: 0px; padding-left: 20px; }}
+                li {{ margin-bottom: 3px; }}
+                hr {{ border: none; border-top: 1px solid {self.theme['border']}; margin-top: 10px; margin-bottom: 10px; }}
+                body {{ color: {self.theme['text_secondary']}; }} /* Default text color */
+            </style>
+            """
 
         # Update styles of all custom components
         self.update_component_styles()
 
-        # Update specific non-custom-widget styles
-        tab_style = f"""
-            QTabWidget::pane {{
+        # Update dashboard theme if it exists
+        # if hasattr(self, 'dashboard_widget'):
+        #     self.dashboard_widget.set_theme(self.theme)
+
+        # Refresh log colors if necessary (might require re-logging or storing raw logs)
+        # Simplest is new logs will have the new theme colors.
+
+
+    # --- update_component_styles ---
+    def update_component_styles(self):
+        """Update styles for all custom styled components"""
+        # One application-wide stylesheet covers every Styled* widget (and any created
+        # later), so a theme switch is a single parse and polish pass
+        QApplication.instance().setStyleSheet(build_global_qss(self.theme) + self._window_stylesheet())
+
+    # --- _window_stylesheet ---
+    def _window_stylesheet(self):
+        """Application stylesheet rules for this window's plain Qt widgets (tabs, stats bar)"""
+        return f"""
+            QTabWidget#mainTabs::pane {{
                 border: 1px solid {self.theme["border"]};
                 border-radius: 4px;
                 padding: 5px;
                 background-color: {self.theme["bg_primary"]}; /* Ensure pane bg matches */
             }}
-            QTabBar::tab {{
+            QTabWidget#mainTabs QTabBar::tab {{
                 background-color: {self.theme["button_bg"]};
                 color: {self.theme["text_primary"]};
                 padding: 10px 20px;
@@ -1077,74 +1553,31 @@ class GmailMonitor(QMainWindow):
                 border: 1px solid {self.theme["border"]}; /* Add border for definition */
                 border-bottom: none; /* Remove bottom border for non-selected */
             }}
-            QTabBar::tab:selected {{
+            QTabWidget#mainTabs QTabBar::tab:selected {{
                 background-color: {self.theme["bg_primary"]}; /* Match pane */
                 color: {self.theme["accent"]}; /* Highlight selected tab text */
                 border-bottom: 1px solid {self.theme["bg_primary"]}; /* Blend bottom border */
                 font-weight: bold;
             }}
-            QTabBar::tab:hover:!selected {{
+            QTabWidget#mainTabs QTabBar::tab:hover:!selected {{
                 background-color: {self.theme["button_hover"]};
             }}
-            QTabBar::tab:disabled {{
+            QTabWidget#mainTabs QTabBar::tab:disabled {{
                  background-color: {self.theme.get('bg_secondary', '#F5F5F5')};
                  color: {self.theme.get('text_secondary', '#AAAAAA')};
             }}
+            QFrame#statsFrame {{
+                border: 1px solid {self.theme["border"]};
+                border-radius: 4px;
+                background-color: {self.theme["bg_secondary"]};
+                padding: 8px 12px; /* Adjusted padding */
+            }}
+            QFrame#statsFrame QLabel {{ /* Style labels within this frame */
+                 color: {self.theme['text_secondary']};
+                 background-color: transparent; /* Ensure no bg override */
+                 border: none; /* Ensure no border override */
+            }}
         """
-        self.tab_widget.setStyleSheet(tab_style)
-
-        stats_frame = self.summaries_tab.findChild(QFrame)
-        if stats_frame:
-             stats_frame_style = f"""
-                 QFrame {{
-                     border: 1px solid {self.theme["border"]};
-                     border-radius: 4px;
-                     background-color: {self.theme["bg_secondary"]};
-                     padding: 8px 12px; /* Adjusted padding */
-                 }}
-                 QLabel {{ /* Style labels within this frame */
-                      color: {self.theme['text_secondary']};
-                      background-color: transparent; /* Ensure no bg override */
-                      border: none; /* Ensure no border override */
-                 }}
-             """
-             stats_frame.setStyleSheet(stats_frame_style)
-
-        # Update dashboard theme if it exists
-        # if hasattr(self, 'dashboard_widget'):
-        #     self.dashboard_widget.set_theme(self.theme)
-
-        # Refresh log colors if necessary (might require re-logging or storing raw logs)
-        # Simplest is new logs will have the new theme colors.
-
-
-    # --- update_component_styles ---
-    def update_component_styles(self):
-        """Update styles for all custom styled components"""
-        # ... (Keep implementation) ...
-        # Iterate through children and call setTheme
-        for widget_type in (StyledButton, StyledGroupBox, StyledTreeWidget,
-                            StyledTextEdit, StyledLineEdit, StyledSpinBox,
-                            StyledComboBox, PulseProgressBar, StyledProgressBar):
-            for widget in self.findChildren(widget_type):
-                if hasattr(widget, 'setTheme'):
-                    widget.setTheme(self.theme)
-
-        # Manually update specific StyledProgressBar if needed (like monitor_progress)
-        if hasattr(self, 'monitor_progress'):
-             self.monitor_progress.setStyleSheet(f"""
-                 QProgressBar {{
-                     border: none;
-                     border-radius: 4px;
-                     background-color: {self.theme["bg_secondary"]};
-                     height: 8px;
-                     text-align: center; /* Center text if visible */
-                 }}
-                 QProgressBar::chunk {{
-                     background-color: {self.theme["accent"]};
-                     border-radius: 4px;
-                 }}
-             """)
 
     # --- format_sender (Moved to utils) ---
     # --- escape_html (Moved to utils) ---
@@ -1153,13 +1586,33 @@ class GmailMonitor(QMainWindow):
     # --- get_attachments_info (Moved to utils) ---
 
 
+    # Emit first_shown once so the launcher can retire its splash screen
+    def showEvent(self, event):
+        """Handle window show event."""
+        super().showEvent(event)
+        if not self._first_shown:
+            self._first_shown = True
+            self.first_shown.emit()
+
     # Add closeEvent handler
     def closeEvent(self, event):
         """Handle window close event."""
         self.log("Close event triggered.", "info")
         self.stop_monitoring() # Ensure monitoring stops cleanly
+        # A running manual check writes to the pool and stores closed below; clearing the
+        # reference cancels it (see _check_cancelled), then wait for it to unwind
+        manual_thread = self.manual_thread
+        self.manual_thread = None
+        if manual_thread is not None:
+            manual_thread.wait()
+        if self._connect_thread is not None:
+            self._connect_thread.wait() # A token refresh may still be in flight
+        self._extract_pool.shutdown(wait=True, cancel_futures=True)
+        self._att_cache.close()
+        self._processed_store.close()
+        self._detail_store.close()
 
         # Persist state if needed (e.g., last search term, matched emails?)
-        # For simplicity, we don't save state here, but you could add pickle saves.
+        # For simplicity, we don't save state here, but you could add json saves.
 
         event.accept() # Accept the close event
\ No newline at end of file
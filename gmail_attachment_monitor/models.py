@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+Qt item models for the Gmail Attachment Monitor application.
+
+Models expose the monitor's plain Python data (lists of email dicts) to Qt
+views without copying it into per-row item objects.
+"""
+
+from typing import Optional
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex, QObject
+
+from .utils import format_sender
+
+
+class MatchedEmailsModel(QAbstractTableModel):
+    """
+    Table model over the matched email dicts shown in the Matched Emails tab.
+
+    Rows index directly into the email dicts; only the four display strings per
+    row (and one lower-cased key joining them, for filtering) are precomputed so
+    painting, sorting and filtering don't re-format anything. Display strings are
+    kept as one list per column rather than a tuple per row.
+    """
+
+    HEADERS = ("Timestamp", "Sender", "Subject", "Matched Attachment(s)")
+    FILENAMES_COLUMN = 3
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._emails = []
+        self._columns = tuple([] for _ in self.HEADERS) # One list of display strings per column
+        self._filter_keys = []
+        self._row_by_id = {}
+
+    def set_emails(self, emails):
+        """Replace the model contents with a snapshot of `emails` (one model reset)."""
+        self.beginResetModel()
+        self._emails = list(emails)
+        self._columns = ([email['timestamp'] for email in self._emails],
+                         [format_sender(email['sender']) for email in self._emails],
+                         [email['subject'] for email in self._emails],
+                         [", ".join(email.get('matched_filenames', ['N/A'])) for email in self._emails])
+        self._filter_keys = ["\t".join(row).lower() for row in zip(*self._columns)]
+        self._row_by_id = {email['id']: row for row, email in enumerate(self._emails)}
+        self.endResetModel()
+
+    def email_at(self, row: int):
+        """Return the email dict shown in `row`."""
+        return self._emails[row]
+
+    def filter_key(self, row: int) -> str:
+        """Return the lower-cased text of every column of `row`, tab-separated."""
+        return self._filter_keys[row]
+
+    def row_for_id(self, email_id):
+        """Return the row of the email with `email_id`, or None if it is not shown."""
+        return self._row_by_id.get(email_id)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._emails)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self._columns[index.column()][index.row()]
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == self.FILENAMES_COLUMN:
+            return self._columns[index.column()][index.row()] # Filenames are often elided
+        if role == Qt.ItemDataRole.UserRole:
+            return self._emails[index.row()]['id']
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+
+class MatchedEmailsProxyModel(QSortFilterProxyModel):
+    """
+    Sort/filter proxy for MatchedEmailsModel.
+
+    Filtering is a case-insensitive substring test against the source model's
+    precomputed row keys: one Python-side check per row instead of fetching and
+    lower-casing every column on each keystroke.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._filter_text = ""
+
+    def set_filter_text(self, text: str):
+        """Show only rows whose columns contain `text` (case-insensitive); empty shows all."""
+        text = text.lower()
+        if text != self._filter_text:
+            self._filter_text = text
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        return not self._filter_text or self._filter_text in self.sourceModel().filter_key(source_row)
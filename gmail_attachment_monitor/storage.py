@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Local persistence helpers for the Gmail Attachment Monitor application.
+
+Small SQLite-backed stores that let the monitor skip work it already did
+in an earlier check or an earlier run of the application.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class AttachmentTextCache:
+    """
+    On-disk LRU cache of text extracted from attachments.
+
+    Keys identify one attachment part of one message; values are the text the
+    extractor produced for it. The cache is bounded both by entry count and by
+    total text size. It may be used from several threads, so every access goes
+    through a lock.
+    """
+
+    # Re-check the bounds after this many insertions
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str, max_entries: int = 5000, max_bytes: int = 1024 ** 3):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._puts_since_prune = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS attachment_text (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_attachment_text_last_used ON attachment_text(last_used)")
+        self._conn.commit()
+        self._prune()
+
+    def get(self, key: str):
+        """Return the cached text for key, or None if it is not cached."""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM attachment_text WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE attachment_text SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return row[0]
+
+    def put(self, key: str, text: str):
+        """Store the extracted text for key."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO attachment_text (key, text, last_used) VALUES (?, ?, ?)",
+                               (key, text, time.time()))
+            self._conn.commit()
+            self._puts_since_prune += 1
+            prune_due = self._puts_since_prune >= self.PRUNE_EVERY
+        if prune_due:
+            self._prune() # Keep long-running sessions within bounds, not just at startup/shutdown
+
+    def _prune(self):
+        """Evict the least recently used entries beyond max_entries or max_bytes."""
+        with self._lock:
+            self._puts_since_prune = 0
+            self._conn.execute("""
+                DELETE FROM attachment_text WHERE key NOT IN (
+                    SELECT key FROM attachment_text ORDER BY last_used DESC LIMIT ?
+                )
+            """, (self.max_entries,))
+            # Running total of text size from most to least recently used; drop everything past the limit
+            self._conn.execute("""
+                DELETE FROM attachment_text WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(LENGTH(CAST(text AS BLOB))) OVER (ORDER BY last_used DESC, key) AS running
+                        FROM attachment_text
+                    ) WHERE running > ?
+                )
+            """, (self.max_bytes,))
+            self._conn.commit()
+
+    def close(self):
+        """Prune and close the underlying database."""
+        self._prune()
+        with self._lock:
+            self._conn.close()
+
+
+class EmailDetailStore:
+    """
+    On-disk store of the bulky parts of matched emails (body text and attachment list).
+
+    The in-memory matched list keeps only what the summaries view shows; details
+    are read back when an email is opened. Contents last for one run of the
+    application, so the store is emptied when it is opened.
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS email_details (
+                id TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                attachments_info TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("DELETE FROM email_details")
+        self._conn.commit()
+
+    def put(self, msg_id: str, body: str, attachments_info: list):
+        """Store the body and attachment list of a matched email."""
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO email_details (id, body, attachments_info) VALUES (?, ?, ?)",
+                               (msg_id, body, json.dumps(attachments_info)))
+            self._conn.commit()
+
+    def get(self, msg_id: str):
+        """Return (body, attachments_info) for msg_id, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute("SELECT body, attachments_info FROM email_details WHERE id = ?",
+                                     (msg_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def clear(self):
+        """Forget every stored email."""
+        with self._lock:
+            self._conn.execute("DELETE FROM email_details")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
+
+
+class ProcessedIdStore:
+    """
+    Persistent record of Gmail message ids that have already been checked.
+
+    Lets the monitor skip re-fetching those messages after a restart. Also keeps
+    a few named values of monitor state (e.g. the last seen mailbox history id).
+    """
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS processed (id TEXT PRIMARY KEY)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def load(self) -> set:
+        """Return all stored message ids."""
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT id FROM processed")}
+
+    def add_many(self, msg_ids):
+        """Record message ids as processed (already known ids are ignored)."""
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO processed (id) VALUES (?)",
+                                   ((msg_id,) for msg_id in msg_ids))
+            self._conn.commit()
+
+    def get_value(self, key: str):
+        """Return the stored state value for key, or None if it is not set."""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_value(self, key: str, value):
+        """Store a state value for key (None removes it)."""
+        with self._lock:
+            if value is None:
+                self._conn.execute("DELETE FROM state WHERE key = ?", (key,))
+            else:
+                self._conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, str(value)))
+            self._conn.commit()
+
+    def clear(self):
+        """Forget every processed id."""
+        with self._lock:
+            self._conn.execute("DELETE FROM processed")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying database."""
+        with self._lock:
+            self._conn.close()
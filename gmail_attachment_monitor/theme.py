@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
+from types import MappingProxyType
+
 from PyQt6.QtGui import QPalette, QColor
 from PyQt6.QtWidgets import QApplication
 
+# Disabled-role colors are the same for every theme
+_DISABLED_TEXT = QColor("#A0A0A0")
+_DISABLED_BTN_BG = QColor("#D0D0D0")
+
 class ThemeManager:
     """Manage application themes and colors"""
 
@@ -10,6 +16,7 @@ class ThemeManager:
         "Light": {
             "bg_primary": "#FFFFFF",
             "bg_secondary": "#F5F5F5",
+            "alt_row": "#F9F9F9", # Striping in item views; subtler than bg_secondary
             "text_primary": "#333333",
             "text_secondary": "#666666",
             "accent": "#1976D2",
@@ -25,6 +32,7 @@ class ThemeManager:
         "Dark": {
             "bg_primary": "#2D2D2D",
             "bg_secondary": "#424242",
+            "alt_row": "#3A3A3A",
             "text_primary": "#E0E0E0",
             "text_secondary": "#BDBDBD",
             "accent": "#2196F3",
@@ -40,6 +48,7 @@ class ThemeManager:
         "Blue": {
             "bg_primary": "#E3F2FD",
             "bg_secondary": "#BBDEFB",
+            "alt_row": "#BBDEFB",
             "text_primary": "#1A237E",
             "text_secondary": "#3949AB",
             "accent": "#1976D2",
@@ -54,6 +63,16 @@ class ThemeManager:
         }
     }
 
+    # Read-only views: the palette cache below and the per-theme caches in the main
+    # window (log colors, details style) assume theme colors never change at runtime
+    THEMES = MappingProxyType({name: MappingProxyType(colors) for name, colors in THEMES.items()})
+
+    # Palettes built so far, by theme name; theme colors are fixed, so each is built once.
+    # Switching themes just hands Qt another cached (implicitly shared) palette; editing one
+    # shared palette in place would make Qt detach and copy it anyway, and setPalette
+    # already ignores a palette equal to the current one.
+    _palette_cache = {}
+
     @staticmethod
     def apply_theme(app: QApplication, theme_name: str = "Light"):
         """Apply a theme to the application"""
@@ -63,6 +82,18 @@ class ThemeManager:
 
         theme = ThemeManager.THEMES[theme_name]
 
+        palette = ThemeManager._palette_cache.get(theme_name)
+        if palette is None:
+            palette = ThemeManager._palette_cache[theme_name] = ThemeManager._build_palette(theme)
+
+        # Apply the palette
+        app.setPalette(palette)
+
+        return theme
+
+    @staticmethod
+    def _build_palette(theme) -> QPalette:
+        """Build the palette for a theme's colors"""
         # Create a palette
         palette = QPalette()
 
@@ -82,12 +113,9 @@ class ThemeManager:
         palette.setColor(QPalette.ColorRole.HighlightedText, QColor(theme["bg_primary"])) # Or white/appropriate contrast
 
         # Set disabled colors (important for usability)
-        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.WindowText, QColor("#A0A0A0"))
-        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.Text, QColor("#A0A0A0"))
-        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.ButtonText, QColor("#A0A0A0"))
-        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.Button, QColor("#D0D0D0")) # Example disabled button bg
-
-        # Apply the palette
-        app.setPalette(palette)
+        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.WindowText, _DISABLED_TEXT)
+        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.Text, _DISABLED_TEXT)
+        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.ButtonText, _DISABLED_TEXT)
+        palette.setColor(QPalette.ColorGroup.Disabled, QPalette.ColorRole.Button, _DISABLED_BTN_BG) # Example disabled button bg
 
-        return theme
\ No newline at end of file
+        return palette
@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
-import time
-from PyQt6.QtCore import QThread, pyqtSignal
+from PyQt6.QtCore import QThread, QMutex, QWaitCondition, pyqtSignal
 
 # --- Threads ---
 # (Copy the EmailCheckerThread and ManualCheckThread classes here)
@@ -9,6 +8,7 @@ class EmailCheckerThread(QThread):
     log_signal = pyqtSignal(str, str)
     update_signal = pyqtSignal()
     progress_signal = pyqtSignal(int) # For interval progress visualization
+    last_check_signal = pyqtSignal(str) # "Last Check: ..." label text
 
     # ... (keep full implementation) ...
 
@@ -16,6 +16,25 @@ class EmailCheckerThread(QThread):
         super().__init__(parent_monitor) # Pass parent if needed, e.g. for accessing settings directly
         self.parent_monitor = parent_monitor
         self.running = False
+        # The thread blocks on this between checks; stop() wakes it right away
+        self._mutex = QMutex()
+        self._wake = QWaitCondition()
+
+    def stop(self):
+        """Ask the loop to exit, interrupting the wait between checks."""
+        self._mutex.lock()
+        self.running = False
+        self._wake.wakeAll()
+        self._mutex.unlock()
+
+    def _wait(self, seconds):
+        """Block for `seconds`, or until stop() is called."""
+        self._mutex.lock()
+        try:
+            if self.running: # stop() may already have been called; don't miss its wake-up
+                self._wake.wait(self._mutex, seconds * 1000)
+        finally:
+            self._mutex.unlock()
 
     def run(self):
         self.running = True
@@ -24,22 +43,17 @@ class EmailCheckerThread(QThread):
                 # Call the parent's method to check emails
                 self.parent_monitor.check_emails()
 
-                # Sleep for the specified interval
-                total_seconds = self.parent_monitor.check_interval
-                for i in range(total_seconds):
-                    if not self.running:
-                        break
-                    # Update progress (optional visualization of interval passing)
-                    progress = int(((i + 1) / total_seconds) * 100)
-                    self.progress_signal.emit(progress)
-                    time.sleep(1)
+                # Sleep for the specified interval, longer while checks keep finding nothing
+                total_seconds = self.parent_monitor.next_check_interval()
+                if total_seconds > self.parent_monitor.check_interval:
+                    self.log_signal.emit(f"No new matches recently; next check in {total_seconds}s", "info")
+                self._wait(total_seconds) # One wake-up per interval instead of one per second
 
             except Exception as e:
                 # Log error using parent's log method via signal
                 self.log_signal.emit(f"Error in monitoring loop: {str(e)}", "error")
                 # Avoid busy-waiting on continuous errors
-                if self.running: # Check if still supposed to be running
-                    time.sleep(60) # Wait before retrying
+                self._wait(60) # Wait before retrying
 
             finally:
                  # Ensure progress resets if loop finishes or errors out
@@ -50,6 +64,8 @@ class EmailCheckerThread(QThread):
 class ManualCheckThread(QThread):
     progress_signal = pyqtSignal(int)
     finished_signal = pyqtSignal()
+    update_signal = pyqtSignal() # New matches were added to matched_emails
+    last_check_signal = pyqtSignal(str) # "Last Check: ..." label text
 
     # ... (keep full implementation) ...
 
@@ -59,11 +75,6 @@ class ManualCheckThread(QThread):
 
     def run(self):
         try:
-            # Fake progress for UX
-            for i in range(10):
-                self.progress_signal.emit(i)
-                time.sleep(0.01)
-
             # Actual check - call parent's method
             self.parent_monitor.check_emails(manual_thread=self) # Pass self
 
@@ -75,4 +86,22 @@ class ManualCheckThread(QThread):
             self.progress_signal.emit(0) # Reset progress on error
 
         finally:
-            self.finished_signal.emit()
\ No newline at end of file
+            self.finished_signal.emit()
+
+
+class GmailConnectThread(QThread):
+    # Valid credentials loaded from token.json, or None when the OAuth flow has to run
+    connected_signal = pyqtSignal(object)
+
+    def __init__(self, parent_monitor=None):
+        super().__init__(parent_monitor)
+        self.parent_monitor = parent_monitor
+
+    def run(self):
+        creds = None
+        try:
+            creds = self.parent_monitor.load_saved_credentials()
+        except Exception as e:
+            self.parent_monitor.log(f"Error loading saved credentials: {str(e)}", "error")
+        finally:
+            self.connected_signal.emit(creds)
@@ -7,38 +7,55 @@ escaping HTML, and potentially other helper tasks.
 """
 
 import base64
-import io
 import re
-import zipfile
-import PyPDF2
-import docx
-import pandas as pd
-from bs4 import BeautifulSoup
+import types
 import html  # <-- Import the standard html module for escaping
+from html.parser import HTMLParser
+# selectolax is imported in html_to_text so it loads only when needed
+
+# Compiled once; used for body parts that declare a non-UTF-8 charset
+_CHARSET_RE = re.compile(r'charset="?([^"]+)"?', re.IGNORECASE)
+# Complete script/style elements, cut out before the pure-Python fallback parser sees them
+_SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+# Charset labels Python's codecs don't resolve to the intended codec on their own
+_CHARSET_ALIASES = types.MappingProxyType({'windows-1252': 'cp1252', 'iso-8859-1': 'latin-1'})
 
 # --- Helper Functions for Attachment Processing & Email Parsing ---
 
-# NOTE: Attachment processing functions (download_attachment, extract_text_from_attachment)
-# remain in main_window.py because they directly need access to 'self.service' and 'self.log'.
-# If this project grew, dependency injection or passing service/logger instances
-# could be used to move them here.
+# NOTE: Attachment downloading (download_attachments_batch) remains in main_window.py
+# because it directly needs access to 'self.service' and 'self.log'. Text extraction
+# lives in extractors.py so it can run in worker processes.
+
+
+def iter_parts(parts, descend=None):
+    """
+    Yields the given message parts and their nested parts depth-first, in
+    document order, without recursion.
+
+    If `descend` is given, only the children of parts for which it returns
+    True are visited; stopping iteration early skips the rest of the tree.
+    """
+    stack = [iter(parts or ())]
+    while stack:
+        part = next(stack[-1], None)
+        if part is None:
+            stack.pop() # This level is done
+            continue
+        yield part
+        # Descend into nested parts before moving on to this part's siblings
+        if 'parts' in part and (descend is None or descend(part)):
+            stack.append(iter(part['parts']))
 
 
 def get_attachments_info(parts):
     """
     Iterates through email message parts to identify and gather information
-    about attachments (filename, mimeType, attachmentId, size).
+    about attachments (filename, mimeType, attachmentId, partId, size).
 
-    Handles nested parts (multipart messages).
+    Handles nested parts (multipart messages), in document order.
     """
     attachments = []
-    if not parts:
-        return attachments
-    for part in parts:
-        # Recursively check nested parts
-        if 'parts' in part:
-            attachments.extend(get_attachments_info(part['parts']))
-
+    for part in iter_parts(parts):
         # Check if the part represents an attachment
         filename = part.get('filename')
         body = part.get('body')
@@ -47,6 +64,7 @@ def get_attachments_info(parts):
                 'filename': filename,
                 'mimeType': part.get('mimeType', 'application/octet-stream'), # Default MIME type
                 'attachmentId': body['attachmentId'],
+                'partId': part.get('partId'), # Stable within a message, unlike attachmentId
                 'size': body.get('size', 0) # Size in bytes
             })
         # TODO: Potentially add handling for inline content treated as attachments
@@ -54,6 +72,68 @@ def get_attachments_info(parts):
     return attachments
 
 
+def get_headers(headers, names) -> dict:
+    """
+    Looks up several headers in one pass over a Gmail header list.
+
+    Returns a dict mapping each (lower-case) name in `names` to the value of the
+    first matching header, or None if absent. Stops once all names are found.
+    """
+    wanted = dict.fromkeys(names)
+    remaining = len(wanted)
+    for header in headers:
+        name = header.get('name', '').lower()
+        if name in wanted and wanted[name] is None:
+            wanted[name] = header.get('value', '')
+            remaining -= 1
+            if not remaining:
+                break
+    return wanted
+
+
+def gmail_parts_fields(depth: int = 5) -> str:
+    """
+    Builds a Gmail partial-response projection for a message payload that keeps
+    the MIME structure (part ids, types, filenames, attachment ids and sizes)
+    but drops the inline body data.
+
+    The projection syntax cannot recurse, so nested parts are spelled out
+    `depth` levels deep.
+    """
+    part_fields = 'partId,mimeType,filename,body(attachmentId,size)'
+    fields = part_fields
+    for _ in range(depth):
+        fields = f'{part_fields},parts({fields})'
+    return fields
+
+
+def split_search_terms(search_term: str) -> list:
+    """
+    Splits the keyword input into individual search terms.
+
+    Terms are separated by commas; surrounding whitespace and empty or
+    case-insensitively repeated terms are dropped.
+    """
+    terms, seen = [], set()
+    for term in search_term.split(','):
+        term = term.strip()
+        if term and term.lower() not in seen:
+            seen.add(term.lower())
+            terms.append(term)
+    return terms
+
+
+def compile_search_pattern(terms) -> "re.Pattern":
+    """
+    Compiles search terms into one case-insensitive regex that matches any of
+    them literally, so each text is scanned once however many terms there are.
+
+    Longer terms come first so overlapping terms report the longer match.
+    """
+    alternatives = sorted((re.escape(term) for term in terms), key=len, reverse=True)
+    return re.compile("|".join(alternatives), re.IGNORECASE)
+
+
 def get_email_body(message):
     """
     Extracts the textual body content from a Gmail message object.
@@ -71,78 +151,36 @@ def get_email_body(message):
     plain_part_encoding = 'utf-8' # Default assumption
     html_part_encoding = 'utf-8' # Default assumption
 
-    def find_content_parts(parts_list):
-        """Helper to recursively find plain and html parts."""
-        nonlocal plain_part_data, html_part_data, plain_part_encoding, html_part_encoding
-        if not parts_list:
-            return
-
-        for part in parts_list:
-            mime_type = part.get('mimeType', '').lower()
-            body = part.get('body', {})
-            data = body.get('data')
-            charset = 'utf-8' # Default per part
-            # Try to find charset in headers
-            for header in part.get('headers', []):
-                 if header.get('name', '').lower() == 'content-type':
-                      ctype_match = re.search(r'charset="?([^"]+)"?', header.get('value', ''), re.IGNORECASE)
-                      if ctype_match:
-                           charset = ctype_match.group(1).lower()
-                           # Handle common aliases/misspellings if needed
-                           if charset == 'windows-1252': charset = 'cp1252'
-                           elif charset == 'iso-8859-1': charset = 'latin-1'
-                           break # Found charset for this part
-
-            if not data:
-                 # If no direct data, check nested parts (like multipart/alternative)
-                 if mime_type.startswith('multipart/') and 'parts' in part:
-                     find_content_parts(part['parts'])
-                 continue # Skip parts without data
-
-            # Store the first found plain and html parts' data and encoding
-            if mime_type == 'text/plain' and plain_part_data is None:
-                plain_part_data = data
-                plain_part_encoding = charset
-            elif mime_type == 'text/html' and html_part_data is None:
-                html_part_data = data
-                html_part_encoding = charset
-
-            # Optimization: If we found both, maybe stop early? Depends on email structure.
-            # if plain_part_data and html_part_data:
-            #     return
-
-    # Start searching from the main payload parts
-    find_content_parts(payload.get('parts'))
-
-    # Handle case where body data is directly in the main payload (simple messages)
-    if plain_part_data is None and html_part_data is None and 'data' in payload.get('body', {}):
-        mime_type = payload.get('mimeType', '').lower()
-        charset = 'utf-8'
-        for header in payload.get('headers', []):
-             if header.get('name', '').lower() == 'content-type':
-                  ctype_match = re.search(r'charset="?([^"]+)"?', header.get('value', ''), re.IGNORECASE)
-                  if ctype_match:
-                       charset = ctype_match.group(1).lower()
-                       if charset == 'windows-1252': charset = 'cp1252'
-                       elif charset == 'iso-8859-1': charset = 'latin-1'
-                       break
-        data = payload['body']['data']
-        if mime_type == 'text/plain':
+    # Walk in document order starting at the payload itself, which covers simple
+    # single-part messages too. The payload's own parts are always walked; nested
+    # parts only inside multipart containers (like multipart/alternative)
+    def descend(part):
+        return part is payload or part.get('mimeType', '').lower().startswith('multipart/')
+
+    for part in iter_parts((payload,), descend):
+        mime_type = part.get('mimeType', '').lower()
+        data = part.get('body', {}).get('data')
+        if not data:
+             continue # Skip parts without data
+
+        # Store the first found plain and html parts' data and encoding; headers are
+        # only looked at for the (at most two) parts that are kept
+        if mime_type == 'text/plain' and plain_part_data is None:
             plain_part_data = data
-            plain_part_encoding = charset
-        elif mime_type == 'text/html':
+            plain_part_encoding = _charset_of(part)
+        elif mime_type == 'text/html' and html_part_data is None:
             html_part_data = data
-            html_part_encoding = charset
-
+            html_part_encoding = _charset_of(part)
+        if plain_part_data is not None and html_part_data is not None:
+            break # Found both; skip the rest of the tree
 
     # --- Decode the preferred part ---
     decoded_successfully = False
     if plain_part_data:
         try:
-            # Decode base64
-            decoded_bytes = base64.urlsafe_b64decode(plain_part_data)
-            # Decode using detected or default encoding
-            body_content = decoded_bytes.decode(plain_part_encoding, errors='replace')
+            # Decode base64, then text with the detected or default encoding, in one expression
+            # so the intermediate bytes are freed as soon as the text exists
+            body_content = base64.urlsafe_b64decode(plain_part_data).decode(plain_part_encoding, errors='replace')
             decoded_successfully = True
             # print(f"DEBUG: Decoded plain text with {plain_part_encoding}")
         except Exception as e:
@@ -152,17 +190,14 @@ def get_email_body(message):
     # If plain text failed or wasn't found, try HTML
     if not decoded_successfully and html_part_data:
         try:
-            # Decode base64
-            decoded_bytes = base64.urlsafe_b64decode(html_part_data)
-            # Decode using detected or default encoding
-            html_content = decoded_bytes.decode(html_part_encoding, errors='replace')
-            # Parse HTML and extract text
-            soup = BeautifulSoup(html_content, 'html.parser')
-            # Remove script and style elements
-            for script_or_style in soup(["script", "style"]):
-                script_or_style.decompose()
-            # Get text content, separating blocks with newlines
-            body_content = soup.get_text(separator='\n', strip=True)
+            # Decode base64, then text with the detected or default encoding
+            html_content = base64.urlsafe_b64decode(html_part_data).decode(html_part_encoding, errors='replace')
+            if '<' not in html_content:
+                # No markup at all (some senders label plain text as HTML); only entities to resolve
+                body_content = html.unescape(html_content).strip()
+            else:
+                # Parse HTML and extract text
+                body_content = html_to_text(html_content)
             decoded_successfully = True
             # print(f"DEBUG: Decoded HTML part with {html_part_encoding} and extracted text")
         except Exception as e:
@@ -176,6 +211,82 @@ def get_email_body(message):
     return body_content
 
 
+def _charset_of(part) -> str:
+    """
+    Returns the charset declared in a message part's Content-Type header,
+    normalized for Python's codecs, or 'utf-8' if none is declared.
+    """
+    content_type = get_headers(part.get('headers', ()), ('content-type',))['content-type']
+    if not content_type:
+        return 'utf-8'
+    lowered = content_type.lower()
+    # Fast path for the common cases: declared UTF-8, or no charset parameter at all
+    if 'utf-8' in lowered or 'charset' not in lowered:
+        return 'utf-8'
+    ctype_match = _CHARSET_RE.search(content_type)
+    if not ctype_match:
+        return 'utf-8'
+    charset = ctype_match.group(1).lower()
+    # Handle common aliases/misspellings
+    return _CHARSET_ALIASES.get(charset, charset)
+
+
+def html_to_text(html_content: str) -> str:
+    """
+    Converts an HTML document to plain text, dropping script and style elements
+    and separating blocks with newlines.
+
+    Uses selectolax when it is installed (much faster on large marketing emails)
+    and falls back to the standard library's streaming parser if it is missing
+    or fails on malformed HTML.
+    """
+    try:
+        from selectolax.lexbor import LexborHTMLParser
+    except ImportError:
+        LexborHTMLParser = None
+
+    if LexborHTMLParser is not None:
+        try:
+            tree = LexborHTMLParser(html_content)
+            tree.strip_tags(['script', 'style'])
+            root = tree.body or tree.root
+            return root.text(separator='\n', strip=True) if root is not None else ""
+        except Exception as e:
+            print(f"Warning: selectolax could not parse HTML, falling back to html.parser: {e}")
+
+    extractor = _HTMLTextExtractor()
+    # The regex runs in C; the parser would otherwise tokenize every script/style byte in Python
+    extractor.feed(_SCRIPT_STYLE_RE.sub('', html_content))
+    extractor.close()
+    # Text nodes separated by newlines, like selectolax's text(separator='\n', strip=True)
+    return "\n".join(extractor.parts)
+
+
+class _HTMLTextExtractor(HTMLParser):
+    """Collects the stripped text nodes of an HTML document, skipping script and style contents."""
+
+    _SKIPPED_TAGS = frozenset({'script', 'style'})
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            data = data.strip()
+            if data:
+                self.parts.append(data)
+
+
 def format_sender(sender: str) -> str:
     """
     Formats the sender string (e.g., "Display Name <email@example.com>")
@@ -184,18 +295,18 @@ def format_sender(sender: str) -> str:
     """
     if not sender:
         return "Unknown Sender"
-    # Regex to capture name inside optional quotes, followed by <email>
-    match = re.match(r'^\s*"?([^"]*?)"?\s*<.+@.+>\s*$', sender.strip())
-    if match and match.group(1):
-        return match.group(1).strip() # Return captured name
-
-    # Fallback: try to extract text before the first '<' if no quotes match
-    match_simple = re.match(r'^(.*?)<.+@.+>\s*$', sender.strip())
-    if match_simple and match_simple.group(1):
-         return match_simple.group(1).strip() # Return text before <
+    sender = sender.strip()
+    # Plain string scan for a trailing <address>; no regex needed
+    lt = sender.rfind('<')
+    if lt <= 0 or not sender.endswith('>') or '@' not in sender[lt:]:
+        # If no angle brackets/email found, return the original string (might just be a name or email)
+        return sender
 
-    # If no angle brackets/email found, return the original string (might just be a name or email)
-    return sender.strip()
+    name = sender[:lt].strip()
+    # Drop optional quotes around the display name
+    if len(name) >= 2 and name[0] == '"' and name[-1] == '"':
+        name = name[1:-1].strip()
+    return name or sender
 
 
 # --- CORRECTED escape_html function ---
@@ -210,6 +321,9 @@ def escape_html(text: str) -> str:
 
      # Use the built-in html.escape which is more reliable and handles more cases
      # quote=True ensures " and ' are also escaped.
+     # Its chained str.replace calls are C-level and return the string untouched when
+     # nothing matches; a str.translate table measured several times slower on
+     # log-sized messages, so this stays the log() hot path.
      return html.escape(text, quote=True)
 # --- End corrected function ---
 
@@ -223,7 +337,9 @@ def format_body_text_no_highlight(body: str) -> str:
         return ""
     # Use the corrected escape_html function
     safe_body = escape_html(body)
-    # Convert newlines to HTML line breaks
+    # Convert newlines to HTML line breaks. Two C-level passes beat a single
+    # str.translate pass here: translate maps characters one at a time and was
+    # over 10x slower on bodies with ordinary punctuation and line breaks.
     formatted_body = safe_body.replace("\n", "<br>")
     return formatted_body
 
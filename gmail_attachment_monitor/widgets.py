@@ -6,19 +6,28 @@ Provides themed widgets inheriting from standard PyQt6 classes
 with enhanced styling and specific functionalities like pulsing progress bars.
 """
 
-from typing import Optional, Dict, Any
+import re
+from typing import Optional, Dict, Union
 
 from PyQt6.QtWidgets import (
-    QProgressBar, QPushButton, QGroupBox, QTreeWidget, QTextEdit, QLineEdit,
-    QSpinBox, QComboBox, QFrame, QLabel, QVBoxLayout, QHBoxLayout, QWidget,
-    QAbstractItemView, QHeaderView, QListView # <-- Added QListView here
+    QProgressBar, QPushButton, QGroupBox, QTreeView, QTextEdit, QLineEdit,
+    QSpinBox, QCheckBox, QComboBox, QFrame, QLabel, QVBoxLayout, QHBoxLayout, QWidget,
+    QAbstractItemView, QListView # <-- Added QListView here
 )
-from PyQt6.QtCore import Qt, QTimer, QSize
+from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QAbstractAnimation
 from PyQt6.QtGui import QFont, QIcon
 
 # Type alias for theme dictionary for clarity
 ThemeDict = Dict[str, str]
 
+# Application stylesheets built by build_global_qss, by id(theme). Themes are the
+# fixed ThemeManager.THEMES mappings, so each is only formatted once; the
+# theme.get(key, default) lookups in the stylesheet() builders are off the
+# theme-switch path and their defaults only guard against incomplete themes.
+_QSS_CACHE: Dict[int, str] = {}
+_QSS_COMMENT_RE = re.compile(r"/\*.*?\*/", re.DOTALL)
+_QSS_SPACE_RE = re.compile(r"\s+")
+
 # --- Progress Bars ---
 
 class StyledProgressBar(QProgressBar):
@@ -30,104 +39,97 @@ class StyledProgressBar(QProgressBar):
         self.setFixedHeight(8)
         self.setMaximum(100)
         self.setValue(0)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("""
-            QProgressBar { border: none; border-radius: 4px; background-color: #E0E0E0; }
-            QProgressBar::chunk { background-color: #1976D2; border-radius: 4px; }
-        """)
-
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the progress bar."""
-        self.setStyleSheet(f"""
-            QProgressBar {{
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the progress bar."""
+        return f"""
+            StyledProgressBar {{
                 border: none;
                 border-radius: 4px;
                 background-color: {theme.get('bg_secondary', '#E0E0E0')};
                 height: 8px; /* Ensure height is maintained */
                 text-align: center; /* Center text if ever made visible */
             }}
-            QProgressBar::chunk {{
+            StyledProgressBar::chunk {{
                 background-color: {theme.get('accent', '#1976D2')};
                 border-radius: 4px;
             }}
-        """)
+        """
 
 
 class PulseProgressBar(QProgressBar):
     """Progress bar that pulses visually when monitoring is active."""
 
+    PULSE_STEPS = 25 # Distinct chunk widths per sweep; also caps repaints at 25 per second
+    PULSE_CYCLE_MS = 2000 # One empty -> full -> empty cycle
+
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self.setTextVisible(False)
         self.setFixedHeight(4) # Make it slimmer for status bar use
-        self.setMaximum(100)
+        self.setMaximum(self.PULSE_STEPS)
         self.setValue(0)
 
-        self.pulse_timer = QTimer(self)
-        self.pulse_timer.timeout.connect(self._pulse_animation)
-        self._pulse_value = 0
-        self._pulse_direction = 1
-
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("""
-            QProgressBar { border: none; border-radius: 2px; background-color: #E0E0E0; }
-            QProgressBar::chunk { background-color: #1976D2; border-radius: 2px; }
-        """)
+        # Qt's animation framework drives the pulse from C++ (one unified timer for
+        # all running animations), so there is no per-frame Python callback. Frames
+        # that land on the same integer value are dropped by setValue itself.
+        self._anim = QPropertyAnimation(self, b"value", self)
+        self._anim.setDuration(self.PULSE_CYCLE_MS)
+        self._anim.setStartValue(0)
+        self._anim.setKeyValueAt(0.5, self.PULSE_STEPS)
+        self._anim.setEndValue(0)
+        self._anim.setLoopCount(-1) # Until stop_pulse
 
     def start_pulse(self):
         """Starts the pulsing animation."""
-        if not self.pulse_timer.isActive():
-            self._pulse_value = 0
-            self._pulse_direction = 1
-            self.setValue(0)
-            self.pulse_timer.start(40) # Adjust interval for pulse speed
+        if self._anim.state() != QAbstractAnimation.State.Running:
+            self._anim.start()
 
     def stop_pulse(self):
         """Stops the pulsing animation and resets the bar."""
-        if self.pulse_timer.isActive():
-            self.pulse_timer.stop()
+        self._anim.stop()
         self.setValue(0) # Reset to empty
 
-    def _pulse_animation(self):
-        """Internal method to update the pulse effect."""
-        increment = 4 # Adjust speed/visibility of pulse
-        self._pulse_value += self._pulse_direction * increment
-
-        # Reverse direction at boundaries
-        if self._pulse_value >= 100:
-            self._pulse_value = 100
-            self._pulse_direction = -1
-        elif self._pulse_value <= 0:
-            self._pulse_value = 0
-            self._pulse_direction = 1
-
-        self.setValue(self._pulse_value)
-
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the pulsing progress bar."""
-        self.setStyleSheet(f"""
-            QProgressBar {{
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the pulsing progress bar."""
+        return f"""
+            PulseProgressBar {{
                 border: none;
                 border-radius: 2px;
                 background-color: {theme.get('bg_secondary', '#E0E0E0')};
                 height: 4px; /* Ensure height is maintained */
             }}
-            QProgressBar::chunk {{
+            PulseProgressBar::chunk {{
                 background-color: {theme.get('accent', '#1976D2')};
                 border-radius: 2px;
             }}
-        """)
+        """
 
 
 # --- Buttons ---
 
+# Icons loaded from files, by path; QIcon is implicitly shared and caches its
+# rendered pixmaps, so buttons using the same file share one icon and its renders.
+_ICON_CACHE: Dict[str, QIcon] = {}
+
+
+def get_icon(path: str) -> QIcon:
+    """Return the shared QIcon for the image file at `path`, loading it on first use."""
+    icon = _ICON_CACHE.get(path)
+    if icon is None:
+        icon = _ICON_CACHE[path] = QIcon(path)
+    return icon
+
+
 class StyledButton(QPushButton):
     """Custom styled button with primary (accent) and secondary options."""
 
     def __init__(self,
                  text: str,
                  parent: Optional[QWidget] = None,
-                 icon: Optional[QIcon] = None,
+                 icon: Optional[Union[QIcon, str]] = None,
                  primary: bool = False):
         """
         Initializes the styled button.
@@ -135,7 +137,7 @@ class StyledButton(QPushButton):
         Args:
             text: Text displayed on the button.
             parent: Parent widget.
-            icon: Optional QIcon for the button.
+            icon: Optional QIcon, or image file path (loaded through get_icon), for the button.
             primary: If True, use accent colors; otherwise, use standard button colors.
         """
         # Call the parent __init__ WITHOUT the 'primary' argument
@@ -143,72 +145,81 @@ class StyledButton(QPushButton):
 
         # Store the primary flag as an instance variable
         self.is_primary = primary # Use a different name to avoid potential clashes
+        self.setProperty("primary", primary) # Selects the rules in the application stylesheet
 
         if icon:
-            self.setIcon(icon)
+            self.setIcon(get_icon(icon) if isinstance(icon, str) else icon)
             # Consider setting icon size if needed: self.setIconSize(QSize(16, 16))
 
         self.setCursor(Qt.CursorShape.PointingHandCursor)
-        # Theme will be applied later by the main window calling setTheme
-
-    def setTheme(self, theme: ThemeDict):
-        """Sets the visual theme for the button based on its type (primary/secondary)."""
+        # Colors come from the application stylesheet (see build_global_qss)
+
+    def setPrimary(self, primary: bool):
+        """Switches between the primary (accent) and secondary look."""
+        self.is_primary = primary
+        self.setProperty("primary", primary)
+        # Dynamic property selectors are only re-evaluated on polish
+        self.style().unpolish(self)
+        self.style().polish(self)
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules for primary and secondary buttons."""
         padding_vertical = 8
         padding_horizontal = 16
         border_radius = 4
 
-        if self.is_primary:
-            # Primary Button Style (Accent Color)
-            self.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {theme.get('accent', '#1976D2')};
-                    color: white; /* High contrast for accent */
-                    border: none;
-                    padding: {padding_vertical}px {padding_horizontal}px;
-                    border-radius: {border_radius}px;
-                    font-weight: bold;
-                }}
-                QPushButton:hover {{
-                    background-color: {theme.get('accent_hover', '#1565C0')};
-                }}
-                QPushButton:pressed {{
-                    background-color: {theme.get('accent', '#1976D2')};
-                    /* Slight inset effect */
-                    padding-top: {padding_vertical + 1}px;
-                    padding-bottom: {padding_vertical - 1}px;
-                }}
-                QPushButton:disabled {{
-                    background-color: {theme.get('button_hover', '#BDBDBD')}; /* Use a theme color */
-                    color: {theme.get('text_secondary', '#757575')};
-                }}
-            """)
-        else:
-            # Secondary Button Style (Standard Theme Button Colors)
-            self.setStyleSheet(f"""
-                QPushButton {{
-                    background-color: {theme.get('button_bg', '#E0E0E0')};
-                    color: {theme.get('button_text', '#333333')};
-                    border: 1px solid {theme.get('border', '#DDDDDD')}; /* Define border */
-                    padding: {padding_vertical - 1}px {padding_horizontal}px; /* Adjust padding for border */
-                    border-radius: {border_radius}px;
-                    font-weight: normal; /* Normal weight for secondary */
-                }}
-                QPushButton:hover {{
-                    background-color: {theme.get('button_hover', '#BDBDBD')};
-                    border-color: {theme.get('button_hover', '#BDBDBD')}; /* Match border */
-                }}
-                QPushButton:pressed {{
-                    background-color: {theme.get('button_bg', '#E0E0E0')};
-                    /* Slight inset effect */
-                    padding-top: {padding_vertical}px;
-                    padding-bottom: {padding_vertical - 2}px;
-                }}
-                QPushButton:disabled {{
-                    background-color: {theme.get('bg_secondary', '#F5F5F5')}; /* Lighter disabled bg */
-                    color: {theme.get('text_secondary', '#AAAAAA')};
-                    border-color: {theme.get('border', '#DDDDDD')};
-                }}
-            """)
+        # Primary Button Style (Accent Color)
+        primary = f"""
+            StyledButton[primary="true"] {{
+                background-color: {theme.get('accent', '#1976D2')};
+                color: white; /* High contrast for accent */
+                border: none;
+                padding: {padding_vertical}px {padding_horizontal}px;
+                border-radius: {border_radius}px;
+                font-weight: bold;
+            }}
+            StyledButton[primary="true"]:hover {{
+                background-color: {theme.get('accent_hover', '#1565C0')};
+            }}
+            StyledButton[primary="true"]:pressed {{
+                background-color: {theme.get('accent', '#1976D2')};
+                /* Slight inset effect */
+                padding-top: {padding_vertical + 1}px;
+                padding-bottom: {padding_vertical - 1}px;
+            }}
+            StyledButton[primary="true"]:disabled {{
+                background-color: {theme.get('button_hover', '#BDBDBD')}; /* Use a theme color */
+                color: {theme.get('text_secondary', '#757575')};
+            }}
+        """
+        # Secondary Button Style (Standard Theme Button Colors)
+        secondary = f"""
+            StyledButton[primary="false"] {{
+                background-color: {theme.get('button_bg', '#E0E0E0')};
+                color: {theme.get('button_text', '#333333')};
+                border: 1px solid {theme.get('border', '#DDDDDD')}; /* Define border */
+                padding: {padding_vertical - 1}px {padding_horizontal}px; /* Adjust padding for border */
+                border-radius: {border_radius}px;
+                font-weight: normal; /* Normal weight for secondary */
+            }}
+            StyledButton[primary="false"]:hover {{
+                background-color: {theme.get('button_hover', '#BDBDBD')};
+                border-color: {theme.get('button_hover', '#BDBDBD')}; /* Match border */
+            }}
+            StyledButton[primary="false"]:pressed {{
+                background-color: {theme.get('button_bg', '#E0E0E0')};
+                /* Slight inset effect */
+                padding-top: {padding_vertical}px;
+                padding-bottom: {padding_vertical - 2}px;
+            }}
+            StyledButton[primary="false"]:disabled {{
+                background-color: {theme.get('bg_secondary', '#F5F5F5')}; /* Lighter disabled bg */
+                color: {theme.get('text_secondary', '#AAAAAA')};
+                border-color: {theme.get('border', '#DDDDDD')};
+            }}
+        """
+        return primary + secondary
 
 
 # --- Containers ---
@@ -218,22 +229,12 @@ class StyledGroupBox(QGroupBox):
 
     def __init__(self, title: str, parent: Optional[QWidget] = None):
         super().__init__(title, parent)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("""
-            QGroupBox {
-                border: 1px solid #DDDDDD; border-radius: 6px;
-                margin-top: 10px; padding: 15px; font-weight: bold;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin; subcontrol-position: top left;
-                padding: 0 5px; color: #1976D2; left: 10px; /* Position title */
-            }
-        """)
-
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the group box."""
-        self.setStyleSheet(f"""
-            QGroupBox {{
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the group box."""
+        return f"""
+            StyledGroupBox {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 6px;
                 margin-top: 10px; /* Space for the title */
@@ -242,7 +243,7 @@ class StyledGroupBox(QGroupBox):
                 padding-top: 20px; /* Extra padding at top for title */
                 background-color: {theme.get('bg_primary', '#FFFFFF')}; /* Set background */
             }}
-            QGroupBox::title {{
+            StyledGroupBox::title {{
                 subcontrol-origin: margin;
                 subcontrol-position: top left;
                 padding: 0 5px; /* Padding around the title text */
@@ -250,57 +251,52 @@ class StyledGroupBox(QGroupBox):
                 color: {theme.get('accent', '#1976D2')}; /* Use accent color for title */
                 background-color: {theme.get('bg_primary', '#FFFFFF')}; /* Match background */
             }}
-        """)
+        """
 
 
 # --- Data Display ---
 
-class StyledTreeWidget(QTreeWidget):
-    """Custom styled tree widget for displaying hierarchical data."""
+class StyledTreeView(QTreeView):
+    """Custom styled tree view for displaying model-backed lists."""
 
-    def __init__(self, parent: Optional[QWidget] = None):
+    def __init__(self, parent: Optional[QWidget] = None, alternating: bool = False):
         super().__init__(parent)
-        self.setAlternatingRowColors(True)
+        self.setAlternatingRowColors(alternating) # Opt-in: striping is an extra fill per row
         self.setRootIsDecorated(False) # Cleaner look for flat lists
         self.setUniformRowHeights(True)
-        self.setAnimated(True) # Subtle animation on expand/collapse
+        self.setAnimated(False) # Flat lists never expand; skip the animation machinery
         self.setSortingEnabled(True)
         self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
         self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("QTreeWidget { border: 1px solid #DDDDDD; border-radius: 4px; }")
-
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the tree widget and its header."""
-        # Determine alternating row color based on primary/secondary background contrast
-        # This provides subtle striping effect
-        alt_row_color = theme.get('bg_secondary', '#F5F5F5')
-        if theme.get('bg_primary') == '#FFFFFF': # Light theme default
-            alt_row_color = '#F9F9F9' # Even subtler alternation for light theme
-        elif theme.get('bg_primary') == '#2D2D2D': # Dark theme default
-             alt_row_color = '#3A3A3A' # Subtler alternation for dark theme
-
-        self.setStyleSheet(f"""
-            QTreeWidget {{
+        # Header sections sort on click; the main window configures their sizing
+        self.header().setSectionsClickable(True)
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the tree view and its header."""
+        # Striping color comes with the theme; fall back to the secondary background
+        alt_row_color = theme.get('alt_row', theme.get('bg_secondary', '#F5F5F5'))
+        return f"""
+            StyledTreeView {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 background-color: {theme.get('bg_primary', '#FFFFFF')};
                 color: {theme.get('text_primary', '#333333')};
                 alternate-background-color: {alt_row_color}; /* Use calculated alt color */
             }}
-            QTreeWidget::item {{
+            StyledTreeView::item {{
                 padding: 6px 5px; /* Adjust vertical/horizontal padding */
                 /* border-bottom: 1px solid {theme.get('border', '#DDDDDD')}; */ /* Optional: item border */
             }}
-            QTreeWidget::item:selected {{
+            StyledTreeView::item:selected {{
                 background-color: {theme.get('accent', '#1976D2')};
                 color: white; /* High contrast selection text */
             }}
-            QTreeWidget::item:hover:!selected {{
+            StyledTreeView::item:hover:!selected {{
                 background-color: {theme.get('button_hover', '#BDBDBD')}30; /* Use alpha transparency for subtle hover */
                 color: {theme.get('text_primary', '#333333')}; /* Ensure text remains readable */
             }}
-            QHeaderView::section {{
+            StyledTreeView QHeaderView::section {{
                 background-color: {theme.get('bg_secondary', '#F5F5F5')};
                 color: {theme.get('text_primary', '#333333')};
                 padding: 5px;
@@ -310,16 +306,11 @@ class StyledTreeWidget(QTreeWidget):
                 font-weight: bold;
                 height: 30px; /* Ensure consistent header height */
             }}
-            QHeaderView {{
+            StyledTreeView QHeaderView {{
                 /* Needed on some platforms to prevent white background artifacts */
                 background-color: {theme.get('bg_secondary', '#F5F5F5')};
             }}
-        """)
-        # Set header properties after setting stylesheet
-        header = self.header()
-        # Don't stretch last section by default, let main window configure it
-        # header.setStretchLastSection(True)
-        header.setSectionsClickable(True)
+        """
 
 
 # --- Input Fields ---
@@ -330,13 +321,12 @@ class StyledTextEdit(QTextEdit):
     def __init__(self, parent: Optional[QWidget] = None, read_only: bool = True):
         super().__init__(parent)
         self.setReadOnly(read_only)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("QTextEdit { border: 1px solid #DDDDDD; border-radius: 4px; padding: 8px; }")
 
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the text edit."""
-        self.setStyleSheet(f"""
-            QTextEdit {{
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the text edit."""
+        return f"""
+            StyledTextEdit {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 background-color: {theme.get('bg_secondary', '#F5F5F5')};
@@ -345,7 +335,7 @@ class StyledTextEdit(QTextEdit):
                 selection-background-color: {theme.get('accent', '#1976D2')}; /* Text selection color */
                 selection-color: white;
             }}
-        """)
+        """
 
 
 class StyledLineEdit(QLineEdit):
@@ -353,13 +343,12 @@ class StyledLineEdit(QLineEdit):
 
     def __init__(self, text: str = "", parent: Optional[QWidget] = None):
         super().__init__(text, parent)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("QLineEdit { border: 1px solid #DDDDDD; border-radius: 4px; padding: 8px; }")
 
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the line edit."""
-        self.setStyleSheet(f"""
-            QLineEdit {{
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the line edit."""
+        return f"""
+            StyledLineEdit {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 padding: 8px;
@@ -368,19 +357,19 @@ class StyledLineEdit(QLineEdit):
                 selection-background-color: {theme.get('accent', '#1976D2')};
                 selection-color: white;
             }}
-            QLineEdit:focus {{
+            StyledLineEdit:focus {{
                 border: 1px solid {theme.get('accent', '#1976D2')}; /* Highlight border on focus */
                 /* Optional: Slightly different background on focus */
                 /* background-color: {theme.get('bg_primary', '#FFFFFF')}; */
             }}
-            QLineEdit:read-only {{
+            StyledLineEdit:read-only {{
                 background-color: {theme.get('button_bg', '#E0E0E0')}; /* Different bg for read-only */
             }}
-            QLineEdit:disabled {{
+            StyledLineEdit:disabled {{
                 background-color: {theme.get('button_hover', '#BDBDBD')}80; /* Semi-transparent disabled look */
                 color: {theme.get('text_secondary', '#AAAAAA')};
             }}
-        """)
+        """
 
 
 class StyledSpinBox(QSpinBox):
@@ -388,13 +377,12 @@ class StyledSpinBox(QSpinBox):
 
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("QSpinBox { border: 1px solid #DDDDDD; border-radius: 4px; padding: 8px; }")
 
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the spin box."""
-        self.setStyleSheet(f"""
-            QSpinBox {{
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the spin box."""
+        return f"""
+            StyledSpinBox {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 padding: 8px; /* Main padding */
@@ -405,10 +393,10 @@ class StyledSpinBox(QSpinBox):
                 selection-color: white;
                 min-height: 20px; /* Ensure minimum height */
             }}
-            QSpinBox:focus {{
+            StyledSpinBox:focus {{
                  border: 1px solid {theme.get('accent', '#1976D2')};
             }}
-            QSpinBox::up-button {{
+            StyledSpinBox::up-button {{
                 subcontrol-origin: border; /* Position relative to border */
                 subcontrol-position: top right; /* Position at the top right */
                 width: 22px; /* Width of the button area */
@@ -418,15 +406,15 @@ class StyledSpinBox(QSpinBox):
                 border-top-right-radius: 3px; /* Match main radius */
                 background-color: {theme.get('button_bg', '#E0E0E0')};
             }}
-            QSpinBox::up-button:hover {{
+            StyledSpinBox::up-button:hover {{
                 background-color: {theme.get('button_hover', '#BDBDBD')};
             }}
-            QSpinBox::up-arrow {{
+            StyledSpinBox::up-arrow {{
                 /* Use standard arrows or provide custom images */
                 /* image: url(path/to/up_arrow.png); */
                 width: 10px; height: 10px;
             }}
-            QSpinBox::down-button {{
+            StyledSpinBox::down-button {{
                 subcontrol-origin: border;
                 subcontrol-position: bottom right; /* Position at the bottom right */
                 width: 22px;
@@ -435,22 +423,53 @@ class StyledSpinBox(QSpinBox):
                 border-bottom-right-radius: 3px; /* Match main radius */
                 background-color: {theme.get('button_bg', '#E0E0E0')};
             }}
-            QSpinBox::down-button:hover {{
+            StyledSpinBox::down-button:hover {{
                 background-color: {theme.get('button_hover', '#BDBDBD')};
             }}
-            QSpinBox::down-arrow {{
+            StyledSpinBox::down-arrow {{
                 /* image: url(path/to/down_arrow.png); */
                  width: 10px; height: 10px;
             }}
-             QSpinBox:disabled {{
+             StyledSpinBox:disabled {{
                 background-color: {theme.get('button_hover', '#BDBDBD')}80;
                 color: {theme.get('text_secondary', '#AAAAAA')};
                 border-color: {theme.get('border', '#DDDDDD')}80;
             }}
-            QSpinBox::up-button:disabled, QSpinBox::down-button:disabled {{
+            StyledSpinBox::up-button:disabled, StyledSpinBox::down-button:disabled {{
                 background-color: {theme.get('bg_secondary', '#F5F5F5')}80;
             }}
-        """)
+        """
+
+
+class StyledCheckBox(QCheckBox):
+    """Custom styled check box."""
+
+    def __init__(self, text: str = "", parent: Optional[QWidget] = None):
+        super().__init__(text, parent)
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the check box label and indicator."""
+        return f"""
+            StyledCheckBox {{
+                color: {theme.get('text_primary', '#333333')};
+                spacing: 8px;
+            }}
+            StyledCheckBox::indicator {{
+                width: 16px;
+                height: 16px;
+                border: 1px solid {theme.get('border', '#DDDDDD')};
+                border-radius: 3px;
+                background-color: {theme.get('bg_secondary', '#F5F5F5')};
+            }}
+            StyledCheckBox::indicator:checked {{
+                background-color: {theme.get('accent', '#1976D2')};
+                border-color: {theme.get('accent', '#1976D2')};
+            }}
+            StyledCheckBox:disabled {{
+                color: {theme.get('text_secondary', '#AAAAAA')};
+            }}
+        """
 
 
 class StyledComboBox(QComboBox):
@@ -458,18 +477,19 @@ class StyledComboBox(QComboBox):
 
     def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
-        # Initial style (will be overridden by setTheme)
-        self.setStyleSheet("QComboBox { border: 1px solid #DDDDDD; border-radius: 4px; padding: 8px; min-width: 100px; }")
 
         # --- CORRECTED LINE ---
         # Use a concrete view like QListView for the popup
-        self.setView(QListView(self))
+        popup_view = QListView(self)
+        popup_view.setUniformItemSizes(True) # Items are single text lines; size one, reuse it
+        self.setView(popup_view)
         # ---------------------
 
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the combo box and its dropdown."""
-        self.setStyleSheet(f"""
-            QComboBox {{
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the combo box and its dropdown."""
+        return f"""
+            StyledComboBox {{
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 padding: 8px;
@@ -479,13 +499,13 @@ class StyledComboBox(QComboBox):
                 min-width: 100px; /* Ensure minimum width */
                 min-height: 20px; /* Ensure minimum height */
             }}
-            QComboBox:focus {{
+            StyledComboBox:focus {{
                 border: 1px solid {theme.get('accent', '#1976D2')};
             }}
-            QComboBox:on {{ /* Styles when the dropdown is open */
+            StyledComboBox:on {{ /* Styles when the dropdown is open */
                 border: 1px solid {theme.get('accent', '#1976D2')};
             }}
-            QComboBox::drop-down {{ /* The dropdown button */
+            StyledComboBox::drop-down {{ /* The dropdown button */
                 subcontrol-origin: padding;
                 subcontrol-position: top right;
                 width: 22px;
@@ -496,16 +516,16 @@ class StyledComboBox(QComboBox):
                 border-bottom-right-radius: 3px;
                 background-color: {theme.get('button_bg', '#E0E0E0')};
             }}
-            QComboBox::drop-down:hover {{
+            StyledComboBox::drop-down:hover {{
                  background-color: {theme.get('button_hover', '#BDBDBD')};
             }}
-            QComboBox::down-arrow {{
+            StyledComboBox::down-arrow {{
                 /* Standard arrow is usually fine */
                 width: 10px; height: 10px;
             }}
 
             /* Style the popup list view */
-            QComboBox QAbstractItemView {{ /* Target the view *within* the combo box */
+            StyledComboBox QAbstractItemView {{ /* Target the view *within* the combo box */
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 4px;
                 background-color: {theme.get('bg_secondary', '#F5F5F5')};
@@ -514,42 +534,50 @@ class StyledComboBox(QComboBox):
                 outline: 0px; /* Remove focus outline from popup */
                 /* Selection colors are handled by the view's palette/stylesheet */
             }}
-            QComboBox QAbstractItemView::item {{
+            StyledComboBox QAbstractItemView::item {{
                  padding: 5px;
                  min-height: 25px;
             }}
             /* Explicitly style the selection within the list view */
-            QComboBox QAbstractItemView::item:selected {{
+            StyledComboBox QAbstractItemView::item:selected {{
                 background-color: {theme.get('accent', '#1976D2')};
                 color: white;
             }}
-            QComboBox QAbstractItemView::item:hover:!selected {{
+            StyledComboBox QAbstractItemView::item:hover:!selected {{
                 background-color: {theme.get('button_hover', '#BDBDBD')}30; /* Subtle hover */
                 color: {theme.get('text_primary', '#333333')};
             }}
 
             /* Disabled state */
-            QComboBox:disabled {{
+            StyledComboBox:disabled {{
                 background-color: {theme.get('button_hover', '#BDBDBD')}80;
                 color: {theme.get('text_secondary', '#AAAAAA')};
                 border-color: {theme.get('border', '#DDDDDD')}80;
             }}
-             QComboBox::drop-down:disabled {{
+             StyledComboBox::drop-down:disabled {{
                 background-color: {theme.get('bg_secondary', '#F5F5F5')}80;
             }}
-        """)
+        """
 
 
 # --- Dashboard Components ---
 
+# Shared by every card; QFont is implicitly shared, so setFont doesn't copy them
+_METRIC_TITLE_FONT = QFont("Segoe UI", 9)
+_METRIC_VALUE_FONT = QFont("Segoe UI", 18, QFont.Weight.Bold)
+
 class MetricCard(QFrame):
     """A styled frame to display a single metric (title and value)."""
-    def __init__(self, title: str, initial_value: str, theme: ThemeDict, parent: Optional[QWidget] = None):
+    def __init__(self, title: str, initial_value: str, parent: Optional[QWidget] = None):
         super().__init__(parent)
         self.setFrameShape(QFrame.Shape.StyledPanel) # Use styled panel shape
 
         self.title_label = QLabel(title)
+        self.title_label.setProperty("metricRole", "title")
+        self.title_label.setFont(_METRIC_TITLE_FONT)
         self.value_label = QLabel(initial_value)
+        self.value_label.setProperty("metricRole", "value")
+        self.value_label.setFont(_METRIC_VALUE_FONT)
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(15, 15, 15, 15)
@@ -558,15 +586,16 @@ class MetricCard(QFrame):
         layout.addWidget(self.value_label)
         layout.addStretch(1) # Push content to top
 
-        self.setTheme(theme) # Apply initial theme
-
     def setValue(self, value: str):
         """Updates the displayed metric value."""
-        self.value_label.setText(str(value)) # Ensure value is string
-
-    def setTheme(self, theme: ThemeDict):
-        """Applies theme colors to the metric card."""
-        self.setStyleSheet(f"""
+        text = str(value) # Ensure value is string
+        if text != self.value_label.text(): # setText re-lays out and repaints even when unchanged
+            self.value_label.setText(text)
+
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the metric card."""
+        return f"""
             MetricCard {{ /* Use class name for specificity */
                 border: 1px solid {theme.get('border', '#DDDDDD')};
                 border-radius: 6px;
@@ -574,20 +603,22 @@ class MetricCard(QFrame):
                 padding: 15px; /* Handled by layout margins now */
                 min-height: 80px; /* Ensure cards have some minimum height */
             }}
-        """)
-        self.title_label.setFont(QFont("Segoe UI", 9))
-        self.title_label.setStyleSheet(f"color: {theme.get('text_secondary', '#666666')}; border: none; background: transparent;")
-        self.value_label.setFont(QFont("Segoe UI", 18, QFont.Weight.Bold))
-        self.value_label.setStyleSheet(f"color: {theme.get('accent', '#1976D2')}; border: none; background: transparent;")
+            MetricCard QLabel[metricRole="title"] {{
+                color: {theme.get('text_secondary', '#666666')}; border: none; background: transparent;
+            }}
+            MetricCard QLabel[metricRole="value"] {{
+                color: {theme.get('accent', '#1976D2')}; border: none; background: transparent;
+            }}
+        """
 
 
 class DashboardWidget(QWidget): # Keep as QWidget, styling is on sub-components
     """Widget containing multiple metric cards and potentially charts."""
 
-    def __init__(self, theme: ThemeDict, parent: Optional[QWidget] = None):
+    METRICS_FLUSH_MS = 250
+
+    def __init__(self, parent: Optional[QWidget] = None):
         super().__init__(parent)
-        self.theme = theme
-        # Initialize UI elements before calling setTheme
         self.email_card = None
         self.checked_card = None
         self.latest_card = None
@@ -595,6 +626,13 @@ class DashboardWidget(QWidget): # Keep as QWidget, styling is on sub-components
         self.chart_label = None
         self._init_ui()
 
+        # Bursts of update_metrics calls are applied once, with the latest values
+        self._pending_metrics = None
+        self._metrics_timer = QTimer(self)
+        self._metrics_timer.setSingleShot(True)
+        self._metrics_timer.setInterval(self.METRICS_FLUSH_MS)
+        self._metrics_timer.timeout.connect(self._flush_metrics)
+
     def _init_ui(self):
         """Initializes the UI components of the dashboard."""
         main_layout = QVBoxLayout(self)
@@ -605,57 +643,90 @@ class DashboardWidget(QWidget): # Keep as QWidget, styling is on sub-components
         grid_layout = QHBoxLayout()
         grid_layout.setSpacing(15)
 
-        # Create metric cards (pass the initial theme)
-        self.email_card = MetricCard("Total Matched Emails", "0", self.theme)
-        self.checked_card = MetricCard("Processed Today", "0", self.theme) # Changed title
-        self.latest_card = MetricCard("Latest Match", "Never", self.theme) # Changed title
+        self.email_card = MetricCard("Total Matched Emails", "0")
+        self.checked_card = MetricCard("Processed Today", "0") # Changed title
+        self.latest_card = MetricCard("Latest Match", "Never") # Changed title
 
         grid_layout.addWidget(self.email_card)
         grid_layout.addWidget(self.checked_card)
         grid_layout.addWidget(self.latest_card)
         main_layout.addLayout(grid_layout)
 
-        # --- Chart Placeholder ---
+    def showEvent(self, event):
+        """Builds the chart placeholder the first time the dashboard is shown."""
+        self._ensure_chart_built()
+        super().showEvent(event)
+
+    def _ensure_chart_built(self):
+        """Creates the chart placeholder frame (deferred until the dashboard is visible)."""
+        if self.chart_frame is not None:
+            return
         self.chart_frame = QFrame()
+        self.chart_frame.setObjectName("chartFrame")
         self.chart_frame.setFrameShape(QFrame.Shape.StyledPanel)
         self.chart_frame.setMinimumHeight(200)
 
         chart_layout = QVBoxLayout(self.chart_frame)
         chart_layout.setContentsMargins(15,15,15,15)
         self.chart_label = QLabel("Activity Chart (Placeholder)")
+        self.chart_label.setObjectName("chartLabel")
         self.chart_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.chart_label.setFont(QFont("Segoe UI", 12, QFont.Weight.Bold))
         chart_layout.addWidget(self.chart_label)
         # TODO: Add actual chart widget here later if needed
 
-        main_layout.addWidget(self.chart_frame, stretch=1) # Allow chart frame to stretch
-
-        # Apply theme to chart frame and label initially
-        self.setTheme(self.theme) # Apply theme to components created here
+        self.layout().addWidget(self.chart_frame, stretch=1) # Allow chart frame to stretch
 
     def update_metrics(self, total_emails: int, processed_count: int, latest_match_time: str):
-        """Updates the values displayed on the metric cards."""
+        """Updates the values displayed on the metric cards (coalesced to at most 4 Hz)."""
+        self._pending_metrics = (total_emails, processed_count, latest_match_time)
+        if not self._metrics_timer.isActive():
+            self._metrics_timer.start()
+
+    def _flush_metrics(self):
+        """Applies the most recent update_metrics values to the cards."""
+        if self._pending_metrics is None:
+            return
+        total_emails, processed_count, latest_match_time = self._pending_metrics
+        self._pending_metrics = None
         if self.email_card: self.email_card.setValue(str(total_emails))
         if self.checked_card: self.checked_card.setValue(str(processed_count))
         if self.latest_card: self.latest_card.setValue(latest_match_time if latest_match_time else "Never")
 
-    def setTheme(self, theme: ThemeDict):
-        """Updates the theme for the dashboard and its components."""
-        self.theme = theme
-        # Update theme for components that need it
-        if self.email_card: self.email_card.setTheme(theme)
-        if self.checked_card: self.checked_card.setTheme(theme)
-        if self.latest_card: self.latest_card.setTheme(theme)
-
-        # Update chart frame style
-        if self.chart_frame:
-            self.chart_frame.setStyleSheet(f"""
-                QFrame {{
-                    border: 1px solid {theme.get('border', '#DDDDDD')};
-                    border-radius: 6px;
-                    background-color: {theme.get('bg_secondary', '#F5F5F5')};
-                }}
-            """)
-        # Update chart label color
-        if self.chart_label:
-            self.chart_label.setStyleSheet(f"color: {theme.get('text_primary', '#333333')}; border: none; background: transparent;")
\ No newline at end of file
+    @staticmethod
+    def stylesheet(theme: ThemeDict) -> str:
+        """Return the application stylesheet rules theming the chart placeholder."""
+        return f"""
+            DashboardWidget QFrame#chartFrame {{
+                border: 1px solid {theme.get('border', '#DDDDDD')};
+                border-radius: 6px;
+                background-color: {theme.get('bg_secondary', '#F5F5F5')};
+            }}
+            DashboardWidget QLabel#chartLabel {{
+                color: {theme.get('text_primary', '#333333')}; border: none; background: transparent;
+            }}
+        """
+
+
+# --- Application Stylesheet ---
+
+_STYLED_WIDGETS = (StyledProgressBar, PulseProgressBar, StyledButton, StyledGroupBox,
+                   StyledTreeView, StyledTextEdit, StyledLineEdit, StyledSpinBox,
+                   StyledCheckBox, StyledComboBox, MetricCard, DashboardWidget)
+
+
+def build_global_qss(theme: ThemeDict) -> str:
+    """
+    Return one application stylesheet theming every widget class in this module.
+
+    Rules use the widget class names as type selectors (plus the `primary`,
+    `metricRole` and object-name hooks set in the constructors), so setting it
+    once on the QApplication styles all instances, including ones created later,
+    with a single stylesheet parse per theme switch. Results are cached per theme.
+    """
+    qss = _QSS_CACHE.get(id(theme))
+    if qss is None:
+        qss = "".join(cls.stylesheet(theme) for cls in _STYLED_WIDGETS)
+        # The builders are written for reading; hand Qt only the rules to tokenize
+        qss = _QSS_CACHE[id(theme)] = _QSS_SPACE_RE.sub(" ", _QSS_COMMENT_RE.sub("", qss)).strip()
+    return qss
@@ -1,43 +1,20 @@
 # -*- coding: utf-8 -*-
+from __future__ import annotations # Qt names in annotations only exist once __main__ has imported them
 import sys
 import os
+import multiprocessing
 
-# --- Early Check for Essential Libraries ---
-# Do this before importing other modules that might fail cryptically if PyQt6 etc. are missing
-try:
-    from PyQt6.QtWidgets import QApplication, QSplashScreen, QLabel, QProgressBar, QVBoxLayout
-    from PyQt6.QtGui import QPixmap, QFont, QColor
-    from PyQt6.QtCore import Qt
-    # Check for other absolutely critical non-standard libraries if needed upfront
-    # import plyer # Example - less critical, can fail later
-except ImportError as e:
-     print(f"Error: Missing essential library: {e.name}")
-     print("-------------------------------------------------------")
-     print("Please ensure you have installed all requirements.")
-     print("Activate your virtual environment and run:")
-     print("  pip install -r requirements.txt")
-     print("-------------------------------------------------------")
-     sys.exit(1) # Exit early if core libs are missing
-
-# --- Set High DPI Attributes (BEFORE QApplication creation) ---
-# This can improve rendering on high-resolution displays
-try:
-    if hasattr(Qt.ApplicationAttribute, 'AA_EnableHighDpiScaling'):
-        QApplication.setAttribute(Qt.ApplicationAttribute.AA_EnableHighDpiScaling, True)
-    if hasattr(Qt.ApplicationAttribute, 'AA_UseHighDpiPixmaps'):
-        QApplication.setAttribute(Qt.ApplicationAttribute.AA_UseHighDpiPixmaps, True)
-except Exception as e:
-    print(f"Warning: Could not set High DPI attributes: {e}")
-
-# --- Import the main application window ---
-# Do this *after* the initial library check
-try:
-    from gmail_attachment_monitor.main_window import GmailMonitor
-except ImportError as e:
-    print(f"Error: Could not import application components: {e}")
-    print("Ensure the project structure is correct and you are running")
-    print("python main.py from the 'gmail-attachment-monitor' directory.")
-    sys.exit(1)
+# --- GUI imports ---
+# PyQt6 is imported in the __main__ block below, not at module level: attachment worker
+# processes (spawn start method) re-import this module as __mp_main__ and must not load Qt.
+
+# High DPI scaling is always enabled in Qt 6 (AA_EnableHighDpiScaling and
+# AA_UseHighDpiPixmaps are deprecated no-ops), so there are no attributes to set here.
+
+# --- The main application window ---
+# Imported in GmailMonitorApp once the splash screen is up: it pulls in the Google API
+# client stack, which is slow to import. Keeping it out of module scope also spares the
+# attachment worker processes, which re-import this module under the spawn start method.
 
 
 # === Application Runner Class ===
@@ -45,111 +22,109 @@ class GmailMonitorApp:
     """Handles application initialization, splash screen, and execution."""
 
     def __init__(self):
-        self.app = QApplication(sys.argv)
-        self.app.setStyle('Fusion') # Good default cross-platform style
+        self.app = QApplication(sys.argv) # Style: Fusion via QT_STYLE_OVERRIDE (see __main__ block)
 
         self.splash = None
         self.window = None
 
+        # Show splash screen
+        self.splash = self.create_splash_screen()
+        if self.splash:
+            self.splash.show()
+            self._splash_message("Initializing components...")
+
+        # The rest of startup runs as event loop continuations, so the splash gets painted
+        # between stages by the loop itself rather than by processEvents() calls
+        QTimer.singleShot(0, self._stage_import)
+
+    def run(self) -> int:
+        """Runs the application event loop (and with it the startup stages); returns the exit code."""
+        return self.app.exec()
+
+    def _splash_message(self, message: str):
+        """Shows a status line at the bottom of the splash screen, if there is one."""
+        if self.splash:
+            self.splash.showMessage(message,
+                                    Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter,
+                                    QColor("#1A237E")) # Readable on the light splash background
+
+    def _stage_import(self):
+        """Startup stage 1: import the main window module."""
         try:
-            # Show splash screen
-            self.splash = self.create_splash_screen()
-            if self.splash:
-                self.splash.show()
-                # Process events to make sure splash screen is displayed immediately
-                self.app.processEvents()
-                self.splash.showMessage("Initializing components...",
-                                       Qt.AlignmentFlag.AlignBottom | Qt.AlignmentFlag.AlignCenter,
-                                       QColor("white")) # Example message update
-
-            # Create and prepare the main window
-            # Initialization errors within GmailMonitor should be handled there (e.g., show QMessageBox)
-            self.window = GmailMonitor()
-
-            # Show main window (it might take a moment to fully render)
-            self.window.show()
-            self.app.processEvents() # Help process window show events
-
-            # Close splash screen once the main window is up
-            if self.splash:
-                self.splash.finish(self.window)
+            from gmail_attachment_monitor.main_window import GmailMonitor
+        except ImportError as e:
+            self._startup_failed(RuntimeError(f"Could not import application components: {e}\n"
+                                              "Ensure the project structure is correct and you are running "
+                                              "python main.py from the 'gmail-attachment-monitor' directory."))
+            return
+        except Exception as e:
+            self._startup_failed(e)
+            return
 
-            # Start the application event loop
-            sys.exit(self.app.exec())
+        self._splash_message("Preparing main window...")
+        QTimer.singleShot(0, lambda: self._stage_build(GmailMonitor))
 
+    def _stage_build(self, window_class):
+        """Startup stage 2: create and show the main window; the splash closes once it is shown."""
+        try:
+            # Initialization errors within GmailMonitor should be handled there (e.g., show QMessageBox)
+            self.window = window_class()
+            # Close splash screen once the main window is up. Queued, so the window gets to
+            # paint first; unlike splash.finish() this never blocks waiting for the expose.
+            self.window.first_shown.connect(self._close_splash, Qt.ConnectionType.QueuedConnection)
+            self.window.show()
         except Exception as e:
-            # Catch unexpected critical errors during startup
-            print(f"FATAL ERROR during application startup: {e}")
-            # Attempt to show a simple message box if possible
-            try:
-                from PyQt6.QtWidgets import QMessageBox
-                msgBox = QMessageBox()
-                msgBox.setIcon(QMessageBox.Icon.Critical)
-                msgBox.setWindowTitle("Fatal Startup Error")
-                msgBox.setText(f"A critical error occurred during startup:\n\n{e}\n\nThe application will now exit.")
-                msgBox.setStandardButtons(QMessageBox.StandardButton.Ok)
-                msgBox.exec()
-            except Exception:
-                # If even QMessageBox fails, just exit
-                pass
-            sys.exit(1)
+            self._startup_failed(e)
+            return
+
+    def _close_splash(self):
+        """Closes the splash screen (the main window has been shown)."""
+        if self.splash:
+            self.splash.close()
+            self.splash = None
+
+    def _startup_failed(self, e: Exception):
+        """Reports a critical startup error and ends the event loop with a failure code."""
+        print(f"FATAL ERROR during application startup: {e}")
+        if self.splash:
+            self.splash.close() # It stays on top and would hide the message box
+        # Attempt to show a simple message box if possible
+        try:
+            from PyQt6.QtWidgets import QMessageBox
+            msgBox = QMessageBox()
+            msgBox.setIcon(QMessageBox.Icon.Critical)
+            msgBox.setWindowTitle("Fatal Startup Error")
+            msgBox.setText(f"A critical error occurred during startup:\n\n{e}\n\nThe application will now exit.")
+            msgBox.setStandardButtons(QMessageBox.StandardButton.Ok)
+            msgBox.exec()
+        except Exception:
+            # If even QMessageBox fails, just exit
+            pass
+        self.app.exit(1)
 
 
     def create_splash_screen(self) -> QSplashScreen | None:
         """Creates and configures the splash screen."""
         try:
             pixmap_width, pixmap_height = 450, 250
-            # Use a simple color fill or load an image QPixmap('path/to/splash.png')
+            # Everything is painted into the pixmap once: no child widgets, layout or
+            # stylesheets to build while the app is still starting. Status text comes
+            # from splash.showMessage.
             splash_pix = QPixmap(pixmap_width, pixmap_height)
             splash_pix.fill(QColor("#E3F2FD")) # Light Blue theme background
 
-            splash = QSplashScreen(splash_pix, Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.FramelessWindowHint)
-            splash.setStyleSheet("""
-                QSplashScreen {
-                    /* Optional: add border */
-                    border: 1px solid #1976D2;
-                    border-radius: 5px;
-                    background-color: #E3F2FD; /* Ensure BG color matches pixmap */
-                }
-            """)
-
-            # Use a layout to position elements on the splash screen
-            splash_layout = QVBoxLayout(splash) # Apply layout directly to splash
-            splash_layout.setContentsMargins(20, 20, 20, 20)
-            splash_layout.addStretch(1) # Push content down
-
-            title_label = QLabel("Gmail Attachment Monitor")
-            title_label.setFont(QFont("Segoe UI", 22, QFont.Weight.Bold))
-            # Ensure label background is transparent if pixmap/border is used
-            title_label.setStyleSheet("color: #1A237E; background-color: transparent; border: none;")
-            title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            splash_layout.addWidget(title_label)
-
-            # No need for subtitle label here if using splash.showMessage
-
-            splash_layout.addSpacing(15)
-
-            progress = QProgressBar()
-            progress.setRange(0, 0) # Indeterminate
-            progress.setTextVisible(False)
-            progress.setStyleSheet("""
-                QProgressBar {
-                    border: none;
-                    border-radius: 4px;
-                    background-color: #BBDEFB; /* Lighter blue */
-                    height: 8px;
-                    margin-left: 30px; /* Add margins */
-                    margin-right: 30px;
-                }
-                QProgressBar::chunk {
-                    background-color: #1976D2; /* Accent blue */
-                    border-radius: 4px;
-                }
-            """)
-            splash_layout.addWidget(progress)
-            splash_layout.addStretch(2) # More space at the bottom
-
-            return splash
+            painter = QPainter(splash_pix)
+            painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            painter.setPen(QColor("#1976D2")) # Border
+            painter.drawRoundedRect(QRectF(0.5, 0.5, pixmap_width - 1, pixmap_height - 1), 5, 5)
+            painter.setPen(QColor("#1A237E"))
+            painter.setFont(QFont("Segoe UI", 22, QFont.Weight.Bold))
+            # Title sits in the upper part, leaving room for the status message below
+            painter.drawText(QRectF(0, 0, pixmap_width, pixmap_height * 2 / 3),
+                             Qt.AlignmentFlag.AlignCenter, "Gmail Attachment Monitor")
+            painter.end()
+
+            return QSplashScreen(splash_pix, Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.FramelessWindowHint)
         except Exception as e:
             print(f"Warning: Could not create splash screen: {e}")
             return None
@@ -157,12 +132,38 @@ class GmailMonitorApp:
 
 # === Main Execution Block ===
 if __name__ == "__main__":
-    # Set environment variables for robust IO encoding, especially on Windows
+    # Attachment parsing runs in worker processes; needed for frozen (e.g. PyInstaller) Windows builds
+    multiprocessing.freeze_support()
+
+    # --- Early Check for Essential Libraries ---
+    # Do this before importing other modules that might fail cryptically if PyQt6 etc. are missing
     try:
-        os.environ['PYTHONIOENCODING'] = 'utf-8'
-        os.environ['PYTHONLEGACYWINDOWSSTDIO'] = 'utf-8'
-    except Exception as e:
-        print(f"Warning: Could not set environment variables for IO encoding: {e}")
+        from PyQt6.QtWidgets import QApplication, QSplashScreen
+        from PyQt6.QtGui import QPixmap, QFont, QColor, QPainter
+        from PyQt6.QtCore import Qt, QRectF, QTimer
+        # Check for other absolutely critical non-standard libraries if needed upfront
+        # import plyer # Example - less critical, can fail later
+    except ImportError as e:
+         print(f"Error: Missing essential library: {e.name}")
+         print("-------------------------------------------------------")
+         print("Please ensure you have installed all requirements.")
+         print("Activate your virtual environment and run:")
+         print("  pip install -r requirements.txt")
+         print("-------------------------------------------------------")
+         sys.exit(1) # Exit early if core libs are missing
+
+    # Robust IO encoding, especially on Windows. PYTHONIOENCODING is read at interpreter
+    # startup, so setting it here would be too late; reconfigure the existing streams instead.
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.reconfigure(encoding='utf-8', errors='replace')
+        except (AttributeError, ValueError): # No console (pythonw) or not a reconfigurable stream
+            pass
+
+    # The stylesheets and palette are written for Fusion, so it is forced even over a desktop's
+    # own QT_STYLE_OVERRIDE. Picking it through the environment lets Qt create it when the first
+    # widget is polished, instead of setStyle() building it up front.
+    os.environ['QT_STYLE_OVERRIDE'] = 'Fusion'
 
     # Instantiate and run the app
-    GmailMonitorApp()
\ No newline at end of file
+    sys.exit(GmailMonitorApp().run())
\ No newline at end of file